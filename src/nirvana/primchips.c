@@ -1,5 +1,7 @@
 #define PY_SSIZE_T_CLEAN
 #include <Python.h>
+#include <stdint.h>
+#include <string.h>
 
 static PyObject *nand(PyObject *self, PyObject *args) {
     int a, b;
@@ -9,6 +11,127 @@ static PyObject *nand(PyObject *self, PyObject *args) {
     return PyBool_FromLong(out);
 }
 
+/*
+ * Evaluates an entire NAND netlist over a batch of input vectors,
+ * without holding the GIL.
+ *
+ * The wires are numbered as in pfbc.hardware.netlist:
+ * wire 0 and 1 are the constants 0 and 1, followed by the inputs
+ * and the outputs of the gates, in order.
+ *
+ * Every array must be C-contiguous, of the given type in native byte order.
+ *
+ * - gates: int32 pairs, the two wires read by every gate;
+ * - n_inputs: number of input wires;
+ * - outputs: int32 per output, the wire it reads;
+ * - inputs: uint64 words, n_inputs per row,
+ *   every bit of a word being a separate input vector;
+ * - out: writable uint64 words, one row of outputs per row of inputs.
+ */
+static int get_array(PyObject *obj, Py_buffer *view, const char *name,
+                     const char *codes, Py_ssize_t itemsize, const char *type, int writable) {
+    if(PyObject_GetBuffer(obj, view, PyBUF_C_CONTIGUOUS | PyBUF_FORMAT) < 0)
+        return -1;
+    if(writable && view->readonly) {
+        PyErr_Format(PyExc_TypeError, "%s must be a writable array", name);
+        return -1;
+    }
+    const char *format = view->format ? view->format : "B";
+    const char *code = format;
+    /* native byte order only */
+#if PY_LITTLE_ENDIAN
+    if(*code == '@' || *code == '=' || *code == '<')
+#else
+    if(*code == '@' || *code == '=' || *code == '>' || *code == '!')
+#endif
+        code++;
+    if(view->itemsize != itemsize || code[0] == '\0' || code[1] != '\0' || !strchr(codes, code[0])) {
+        PyErr_Format(PyExc_ValueError, "%s must be a contiguous %s array, got format '%s'", name, type, format);
+        return -1;
+    }
+    return 0;
+}
+
+static PyObject *evaluate(PyObject *self, PyObject *args) {
+    Py_buffer gates = {0}, outputs = {0}, inputs = {0}, out = {0};
+    PyObject *gates_obj, *outputs_obj, *inputs_obj, *out_obj;
+    Py_ssize_t n_inputs;
+    if(!PyArg_ParseTuple(args, "OnOOO", &gates_obj, &n_inputs, &outputs_obj, &inputs_obj, &out_obj))
+        return NULL;
+
+    PyObject *result = NULL;
+    uint64_t *values = NULL;
+    if(get_array(gates_obj, &gates, "gates", "il", 4, "int32", 0) < 0
+            || get_array(outputs_obj, &outputs, "outputs", "il", 4, "int32", 0) < 0
+            || get_array(inputs_obj, &inputs, "inputs", "LQ", 8, "uint64", 0) < 0
+            || get_array(out_obj, &out, "out", "LQ", 8, "uint64", 1) < 0)
+        goto done;
+    const int32_t *g = gates.buf;
+    const int32_t *o = outputs.buf;
+    Py_ssize_t n_gates = gates.len / (2*sizeof(int32_t));
+    Py_ssize_t n_outputs = outputs.len / sizeof(int32_t);
+    Py_ssize_t first = 2 + n_inputs;
+    Py_ssize_t n_wires = first + n_gates;
+
+    if(gates.len % (2*sizeof(int32_t)) || outputs.len % sizeof(int32_t)) {
+        PyErr_SetString(PyExc_ValueError, "gates and outputs must be int32 arrays");
+        goto done;
+    }
+    if(n_inputs < 0 || inputs.len % sizeof(uint64_t) || out.len % sizeof(uint64_t)) {
+        PyErr_SetString(PyExc_ValueError, "inputs and out must be uint64 arrays");
+        goto done;
+    }
+    Py_ssize_t rows = n_inputs ? inputs.len / (Py_ssize_t)sizeof(uint64_t) / n_inputs : 0;
+    if(rows * n_inputs * (Py_ssize_t)sizeof(uint64_t) != inputs.len
+            || rows * n_outputs * (Py_ssize_t)sizeof(uint64_t) != out.len) {
+        PyErr_SetString(PyExc_ValueError, "inputs and out hold a different number of rows");
+        goto done;
+    }
+    for(Py_ssize_t i = 0; i < n_gates; i++) {
+        if(g[2*i] < 0 || g[2*i] >= first+i || g[2*i+1] < 0 || g[2*i+1] >= first+i) {
+            PyErr_Format(PyExc_ValueError, "gate %zd reads a wire that is not driven yet", i);
+            goto done;
+        }
+    }
+    for(Py_ssize_t i = 0; i < n_outputs; i++) {
+        if(o[i] < 0 || o[i] >= n_wires) {
+            PyErr_Format(PyExc_ValueError, "output %zd reads an unknown wire", i);
+            goto done;
+        }
+    }
+
+    values = PyMem_RawMalloc(n_wires * sizeof(uint64_t));
+    if(values == NULL) {
+        PyErr_NoMemory();
+        goto done;
+    }
+
+    const uint64_t *in = inputs.buf;
+    uint64_t *dst = out.buf;
+    Py_BEGIN_ALLOW_THREADS
+    values[0] = 0;
+    values[1] = ~(uint64_t)0;
+    for(Py_ssize_t r = 0; r < rows; r++) {
+        memcpy(values+2, in + r*n_inputs, n_inputs*sizeof(uint64_t));
+        for(Py_ssize_t i = 0; i < n_gates; i++)
+            values[first+i] = ~(values[g[2*i]] & values[g[2*i+1]]);
+        for(Py_ssize_t i = 0; i < n_outputs; i++)
+            dst[r*n_outputs + i] = values[o[i]];
+    }
+    Py_END_ALLOW_THREADS
+
+    result = Py_None;
+    Py_INCREF(result);
+
+done:
+    PyMem_RawFree(values);
+    PyBuffer_Release(&gates);
+    PyBuffer_Release(&outputs);
+    PyBuffer_Release(&inputs);
+    PyBuffer_Release(&out);
+    return result;
+}
+
 static PyMethodDef PrimChipsMethods[] = {
     {
         "nand",
@@ -16,6 +139,14 @@ static PyMethodDef PrimChipsMethods[] = {
         METH_VARARGS,
         "Python interface for NAND chip written in C",
     },
+    {
+        "evaluate",
+        evaluate,
+        METH_VARARGS,
+        "evaluate(gates, n_inputs, outputs, inputs, out)\n\n"
+        "Evaluates a NAND netlist over rows of 64-bit input words, "
+        "releasing the GIL while doing so.",
+    },
     {NULL, NULL, 0, NULL}
 };
 
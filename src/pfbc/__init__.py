@@ -19,3 +19,19 @@ contains all the sub modules that form taken together the software
 running on the machine (including a high level language that allows
 you to program modern applications, as well as some example applications).
 """
+
+import importlib
+
+
+__all__ = ['hardware']
+
+
+def __getattr__(name: str):
+    # sub modules are only imported once used, see PEP 562
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -6,5 +6,58 @@ the hardware part of the 16-bit computer.
 
 - chips.py contains the logic gates used
 as the primitive building blocks for everything else.
+- alu.py contains the adders and the ALU,
+the arithmetic part of the computer.
+- mul.py contains Mul16, an optional hardware multiplier.
+- codec.py converts between integers and bus values.
+- machine.py emulates the computer at word level,
+running programs from its ROM.
+- clock.py runs a machine on an asyncio event loop, servicing
+its keyboard and screen, optionally at a target clock frequency.
+- debugger.py runs a machine with breakpoints and watchpoints.
+- memory.py contains a sparse RAM allocated per page, for wide addresses.
 
-"""
\ No newline at end of file
+Next to these layers you'll find the tooling used to analyse them:
+
+- netlist.py flattens any chip into the NAND gates it is made of;
+- faults.py measures how well a set of test vectors
+catches stuck-at faults in a chip;
+- activity.py counts the toggles of every wire of a chip
+over a workload, estimating its dynamic power;
+- testscript.py runs the .tst test scripts and .cmp compare files
+of the nand2tetris course against our chips;
+- native.py implements every chip directly on words, and
+fidelity.py selects per chip between the gate-level, compiled netlist
+and native implementation, optionally cross-checking the fast one;
+- batch.py evaluates a chip over large batches of input vectors
+in the nirvana extension, which releases the GIL while doing so;
+- levelized.py simulates a netlist a level of gates at a time
+over a NumPy matrix of wires;
+- bench.py benchmarks all of the above (make bench);
+- cache.py keeps the netlists of the chips precompiled on disk.
+
+Sub modules are only imported once used, either imported
+explicitly or as an attribute of this module.
+"""
+
+import importlib
+
+
+__all__ = [
+    'chips', 'alu', 'mul', 'codec',
+    'machine', 'clock', 'debugger', 'memory',
+    'netlist', 'faults', 'activity', 'testscript',
+    'native', 'fidelity', 'batch', 'levelized', 'bench', 'cache',
+    'nirvana',
+]
+
+
+def __getattr__(name: str):
+    # sub modules are only imported once used, see PEP 562
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,162 @@
+"""
+activity.py estimates the dynamic power of a chip
+by counting how often each of its wires toggles
+while the chip works through a workload.
+
+A CMOS gate mostly consumes power when its output switches,
+charging or discharging the wires it drives. The number of
+toggles per wire over a realistic sequence of input vectors
+is thus a good estimate of the power a design consumes,
+next to its gate count, which only says something about its area.
+
+The workload is simulated on the netlist of the chip (see levelized.py),
+64 input vectors at a time: every wire carries an unsigned 64-bit
+word in which bit n holds the value of that wire for the n-th vector
+of the batch. Comparing every bit with the bit before it (carrying
+the last bit over from the previous word and batch) gives
+all toggles of a wire in a handful of NumPy operations.
+"""
+
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Sequence, Tuple
+
+import numpy as np
+
+from pfbc.hardware.codec import LANES, pack_lanes
+from pfbc.hardware.levelized import LevelizedSimulator
+from pfbc.hardware.netlist import Netlist, trace
+
+
+def popcount(words: np.ndarray) -> np.ndarray:
+    """
+    Counts the set bits of every row of a matrix of 64-bit words.
+    """
+    return np.unpackbits(words.view(np.uint8), axis=1).sum(axis=1, dtype=np.int64)
+
+
+class ActivityReport:
+    """
+    The toggles counted for every wire of a single chip.
+    """
+
+    def __init__(self, netlist: Netlist, toggles: np.ndarray, vectors: int):
+        self.netlist = netlist
+        self.toggles = toggles
+        self.vectors = vectors
+
+    @property
+    def gate_toggles(self) -> np.ndarray:
+        """
+        Toggles per gate output, the inputs and constants left out.
+        """
+        return self.toggles[self.netlist.first_gate:]
+
+    @property
+    def total(self) -> int:
+        return int(self.gate_toggles.sum())
+
+    @property
+    def activity(self) -> float:
+        """
+        Average chance for a gate output to toggle between two vectors.
+        """
+        transitions = (self.vectors - 1) * len(self.netlist.gates)
+        if transitions <= 0:
+            return 0.0
+        return self.total / transitions
+
+    def energy(self, capacitance: float = 1.0, voltage: float = 1.0) -> float:
+        """
+        Switching energy (1/2 C V^2 per toggle) spent over the workload,
+        with the same capacitance assumed for the output of every gate.
+        """
+        return 0.5 * capacitance * voltage**2 * self.total
+
+    def by_chip(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Number of gates and toggles per chip the design is built from,
+        where every chip includes the gates of the chips within it.
+        """
+        chips = OrderedDict()
+        for (scope, toggles) in zip(self.netlist.scopes, self.gate_toggles):
+            for name in OrderedDict.fromkeys(scope):
+                gates, total = chips.get(name, (0, 0))
+                chips[name] = (gates + 1, total + int(toggles))
+        return chips
+
+    def __str__(self) -> str:
+        lines = [
+            f"{self.netlist.name}: {len(self.netlist.gates)} gates, {self.vectors} vectors, "
+            f"{self.total} toggles ({self.activity:.2%} activity)",
+        ]
+        for (name, (gates, toggles)) in self.by_chip().items():
+            lines.append(f"  {name:<12} {gates:>6} gates {toggles:>10} toggles")
+        return '\n'.join(lines)
+
+
+class ActivityCounter:
+    """
+    Accumulates the toggles of every wire of a chip
+    over any number of batches of input vectors.
+
+    Batches are treated as a single continuous workload,
+    such that the first vector of a batch is compared
+    against the last vector of the batch before it.
+    """
+
+    def __init__(self, netlist: Netlist):
+        self.netlist = netlist
+        self.simulator = LevelizedSimulator(netlist)
+        self.toggles = np.zeros(netlist.n_wires, dtype=np.int64)
+        self.vectors = 0
+        self._last = None
+
+    def feed(self, vectors: Iterable[Sequence]):
+        """
+        Feeds a batch of vectors, a vector being the arguments
+        with which the chip is called.
+        """
+        bits = [self.netlist.flatten_inputs(*vector) for vector in vectors]
+        self.feed_bits(np.array(bits, dtype=bool).reshape(len(bits), self.netlist.n_inputs))
+
+    def feed_bits(self, bits: np.ndarray):
+        """
+        Feeds a batch of vectors given as a boolean matrix
+        with one row of input bits per vector.
+        """
+        n = len(bits)
+        if n == 0:
+            return
+        values = self.simulator.evaluate_wires(pack_lanes(bits.T))
+
+        previous = values << np.uint64(1)
+        previous[:, 1:] |= values[:, :-1] >> np.uint64(LANES-1)
+        mask = np.full(values.shape[1], ~np.uint64(0), dtype=np.uint64)
+        if n % LANES:
+            mask[-1] = np.uint64((1 << (n % LANES)) - 1)
+        if self._last is None:
+            mask[0] &= ~np.uint64(1)
+        else:
+            previous[:, 0] |= self._last
+        self.toggles += popcount((values ^ previous) & mask)
+
+        self._last = (values[:, -1] >> np.uint64((n-1) % LANES)) & np.uint64(1)
+        self.vectors += n
+
+    def report(self) -> ActivityReport:
+        return ActivityReport(self.netlist, self.toggles.copy(), self.vectors)
+
+
+def measure(chip: Callable, vectors: Iterable[Sequence], batch_size: int = 4096) -> ActivityReport:
+    """
+    Traces the chip and counts its toggles over the given workload.
+    """
+    counter = ActivityCounter(trace(chip))
+    batch = []
+    for vector in vectors:
+        batch.append(vector)
+        if len(batch) == batch_size:
+            counter.feed(batch)
+            batch = []
+    counter.feed(batch)
+    return counter.report()
@@ -0,0 +1,69 @@
+import random
+import unittest
+
+import numpy as np
+
+from pfbc.hardware.chips import Not, Xor, Mux8Way16
+from pfbc.hardware.alu import add16
+from pfbc.hardware.netlist import trace, random_args
+from pfbc.hardware.activity import \
+    popcount, ActivityCounter, measure
+
+
+def serial_toggles(netlist, vectors):
+    """
+    Reference implementation evaluating one vector at a time.
+    """
+    toggles = [0]*netlist.n_wires
+    last = None
+    for vector in vectors:
+        values = netlist.evaluate_bits(netlist.flatten_inputs(*vector))
+        if last is not None:
+            toggles = [t + (x != y) for (t, x, y) in zip(toggles, values, last)]
+        last = values
+    return toggles
+
+
+class TestPopcount(unittest.TestCase):
+    def test_popcount(self):
+        words = np.array([[1, 2], [1 << 63, 0xFF]], dtype=np.uint64)
+        self.assertEqual([2, 9], popcount(words).tolist())
+
+
+class TestActivity(unittest.TestCase):
+    def test_not(self):
+        report = measure(Not, [(False,), (True,), (True,), (False,)])
+        self.assertEqual(2, report.total)
+        self.assertEqual(4, report.vectors)
+        self.assertAlmostEqual(2/3, report.activity)
+        self.assertEqual(1.0, report.energy())
+
+    def test_matches_serial(self):
+        rng = random.Random(3)
+        for chip in [Xor, Mux8Way16, add16]:
+            netlist = trace(chip)
+            vectors = random_args(netlist.widths, rng, 150)
+            counter = ActivityCounter(netlist)
+            # batches that do not line up with the 64-bit words
+            for start in range(0, len(vectors), 50):
+                counter.feed(vectors[start:start+50])
+            report = counter.report()
+            self.assertEqual(serial_toggles(netlist, vectors), report.toggles.tolist(), chip.__name__)
+
+    def test_by_chip(self):
+        rng = random.Random(5)
+        netlist = trace(add16)
+        counter = ActivityCounter(netlist)
+        counter.feed(random_args(netlist.widths, rng, 100))
+        chips = counter.report().by_chip()
+        self.assertEqual((len(netlist.gates), counter.report().total), chips['add16'])
+        self.assertEqual(15*2*6 + 6, chips['Xor'][0])
+
+    def test_empty(self):
+        report = measure(Xor, [])
+        self.assertEqual(0, report.total)
+        self.assertEqual(0.0, report.activity)
+
+
+if __name__ == '__main__':
+    unittest.main()
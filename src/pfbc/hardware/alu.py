@@ -14,7 +14,8 @@ as if these numbers were positive numbers
 
 from pfbc.hardware.chips import \
     Bit, Bus2, Bus16, \
-    Xor, And, Or
+    Xor, And, Or, Not, \
+    Not16, And16, Mux16, Or8Way
 
 
 def adder_half(a: Bit, b: Bit) -> Bus2:
@@ -124,4 +125,13 @@ def alu(x: Bus16, y: Bus16, zx: Bit, nx: Bit, zy: Bit, ny: Bit, f: Bit, no: Bit)
     zr, // 1 if (out == 0), 0 otherwise
     ng; // 1 if (out < 0),  0 otherwise
     """
-    raise NotImplementedError  # TODO
+    zero = tuple([False]*16)
+    x = Mux16(x, zero, zx)
+    x = Mux16(x, Not16(x), nx)
+    y = Mux16(y, zero, zy)
+    y = Mux16(y, Not16(y), ny)
+    out = Mux16(And16(x, y), add16(x, y), f)
+    out = Mux16(out, Not16(out), no)
+    zr = Not(Or(Or8Way(out[:8]), Or8Way(out[8:])))
+    ng = out[0]
+    return out, zr, ng
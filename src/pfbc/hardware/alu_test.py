@@ -1,10 +1,11 @@
-from itertools import combinations_with_replacement
+from itertools import combinations_with_replacement, product
 import unittest
 
 from pfbc.hardware.alu import \
     adder_half, adder_full, \
     add16, inc16, \
     alu
+from pfbc.hardware.codec import to_bus16, from_bus16
 
 
 class TestAdders(unittest.TestCase):
@@ -23,29 +24,30 @@ class TestAdders(unittest.TestCase):
             self.assertEqual((_sum, carry), adder_full(a, b, c), f"{a}, {b}, {c} => {t} (= {x}+{y}+{z}), {_sum}, {carry}")
 
     def test_add16(self):
-        for s in combinations_with_replacement(['0', '1'], 32):
+        for s in combinations_with_replacement([False, True], 32):
             a, b = s[:16], s[16:]
-            s = int(''.join(a), 2) + int(''.join(b), 2)
-            r = "{0:b}".format(s)
-            if len(r) > 16:
-                r = r[-16:]
-            elif len(r) < 16:
-                r = '0'*(16-len(r)) + r
-            result = tuple(bool(int(c)) for c in r)
-            self.assertEqual(result, add16([x == '1' for x in a], [x == '1' for x in b]), f"{''.join(a)} + {''.join(b)} = {s} = {r} = {result}")
+            s = from_bus16(a) + from_bus16(b)
+            result = to_bus16(s)
+            self.assertEqual(result, add16(a, b), f"{from_bus16(a)} + {from_bus16(b)} = {s}")
 
     def test_inc16(self):
-        for a in combinations_with_replacement(['0', '1'], 16):
-            s = int(''.join(a), 2) + 1
-            r = "{0:b}".format(s)
-            if len(r) > 16:
-                r = r[-16:]
-            elif len(r) < 16:
-                r = '0'*(16-len(r)) + r
-            result = tuple(bool(int(c)) for c in r)
-            self.assertEqual(result, inc16([x == '1' for x in a]), f"{''.join(a)} + 1 = {s} = {r} = {result}")
+        for a in combinations_with_replacement([False, True], 16):
+            s = from_bus16(a) + 1
+            result = to_bus16(s)
+            self.assertEqual(result, inc16(a), f"{from_bus16(a)} + 1 = {s}")
 
 
 class TestALU(unittest.TestCase):
     def test_alu(self):
-        pass  # TODO
+        for (x, y) in [(0, 0), (1, 0xFFFF), (17, 3), (0x8000, 0x7FFF), (12345, 54321)]:
+            for (zx, nx, zy, ny, f, no) in product([False, True], repeat=6):
+                a, b = x, y
+                if zx: a = 0
+                if nx: a = ~a & 0xFFFF
+                if zy: b = 0
+                if ny: b = ~b & 0xFFFF
+                o = (a + b) & 0xFFFF if f else a & b
+                if no: o = ~o & 0xFFFF
+                expected = (to_bus16(o), o == 0, o >= 0x8000)
+                out = alu(to_bus16(x), to_bus16(y), zx, nx, zy, ny, f, no)
+                self.assertEqual(expected, out, f"{x}, {y}, {(zx, nx, zy, ny, f, no)} => {o}")
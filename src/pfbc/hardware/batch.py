@@ -0,0 +1,79 @@
+"""
+batch.py evaluates a chip over large batches of input vectors
+using the netlist evaluator of the nirvana extension.
+
+The netlist (see netlist.py) is handed to nirvana as a compact array
+of gates, and the input vectors as rows of 64-bit words, with every bit
+of a word being a separate input vector. nirvana releases the GIL for
+the entire batch, such that splitting a batch over the threads of a
+ThreadPoolExecutor makes use of every core, without paying
+for the pickling a process pool would require.
+"""
+
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+import numpy as np
+
+from pfbc.hardware import cache
+from pfbc.hardware.codec import pack_lanes, unpack_lanes
+from pfbc.hardware.netlist import Netlist
+from pfbc.hardware.nirvana import evaluate
+
+
+class BatchEvaluator:
+    """
+    Evaluates a single netlist over batches of input vectors.
+    """
+
+    def __init__(self, netlist: Netlist):
+        self.netlist = netlist
+        self.gates = np.array(netlist.gates, dtype=np.int32).reshape(-1, 2)
+        self.outputs = np.array(netlist.outputs, dtype=np.int32)
+
+    @classmethod
+    def for_chip(cls, chip: Callable) -> 'BatchEvaluator':
+        return cls(cache.netlist(chip))
+
+    def evaluate_words(self, words: np.ndarray) -> np.ndarray:
+        """
+        Evaluates rows of packed input words of shape (rows, n_inputs),
+        returning the packed output words of shape (rows, n_outputs).
+        """
+        words = np.ascontiguousarray(words, dtype=np.uint64)
+        if words.ndim != 2 or words.shape[1] != self.netlist.n_inputs:
+            raise ValueError(f"expected rows of {self.netlist.n_inputs} input words, got shape {words.shape}")
+        out = np.empty((words.shape[0], len(self.outputs)), dtype=np.uint64)
+        evaluate(self.gates, self.netlist.n_inputs, self.outputs, words, out)
+        return out
+
+    def evaluate_words_parallel(self, words: np.ndarray, executor: Optional[Executor] = None,
+                                chunk: int = 256) -> np.ndarray:
+        """
+        Like evaluate_words, but splits the rows in chunks
+        evaluated on the threads of the given executor
+        (a ThreadPoolExecutor with default settings if none is given).
+        """
+        words = np.ascontiguousarray(words, dtype=np.uint64)
+        if executor is None:
+            with ThreadPoolExecutor() as executor:
+                return self.evaluate_words_parallel(words, executor, chunk)
+        starts = range(0, len(words), chunk)
+        parts = list(executor.map(lambda i: self.evaluate_words(words[i:i+chunk]), starts))
+        if not parts:
+            return np.empty((0, len(self.outputs)), dtype=np.uint64)
+        return np.concatenate(parts)
+
+    def evaluate(self, bits: np.ndarray, executor: Optional[Executor] = None) -> np.ndarray:
+        """
+        Evaluates a boolean matrix with one row of input bits per vector,
+        returning a boolean matrix with one row of output bits per vector.
+        """
+        bits = np.asarray(bits, dtype=bool).reshape(-1, self.netlist.n_inputs)
+        # bit j of word (r, i) is input i of vector 64*r+j
+        words = pack_lanes(bits.T).T
+        if executor is None:
+            out = self.evaluate_words(words)
+        else:
+            out = self.evaluate_words_parallel(words, executor)
+        return unpack_lanes(out.T, len(bits)).T
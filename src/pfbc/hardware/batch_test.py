@@ -0,0 +1,117 @@
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import threading
+import unittest
+
+import numpy as np
+
+from pfbc.hardware import nirvana
+from pfbc.hardware.chips import Xor, Mux8Way16
+from pfbc.hardware.alu import alu
+from pfbc.hardware.batch import BatchEvaluator
+from pfbc.hardware.netlist import trace
+
+
+class TestNirvanaEvaluate(unittest.TestCase):
+    def test_xor(self):
+        gates = np.array([(2, 3), (2, 2), (3, 3), (5, 6), (4, 7), (8, 8)], dtype=np.int32)
+        outputs = np.array([9], dtype=np.int32)
+        words = np.array([[0b0011, 0b0101]], dtype=np.uint64)
+        out = np.empty((1, 1), dtype=np.uint64)
+        nirvana.evaluate(gates, 2, outputs, words, out)
+        self.assertEqual(0b0110, int(out[0, 0]) & 0xF)
+
+    def test_validation(self):
+        out = np.empty((1, 1), dtype=np.uint64)
+        words = np.zeros((1, 2), dtype=np.uint64)
+        with self.assertRaises(ValueError):
+            nirvana.evaluate(np.array([(2, 4)], dtype=np.int32), 2, np.array([4], dtype=np.int32), words, out)
+        with self.assertRaises(ValueError):
+            nirvana.evaluate(np.array([(2, 3)], dtype=np.int32), 2, np.array([5], dtype=np.int32), words, out)
+        with self.assertRaises(ValueError):
+            nirvana.evaluate(np.array([(2, 3)], dtype=np.int32), 2, np.array([4], dtype=np.int32), words,
+                             np.empty((2, 1), dtype=np.uint64))
+        with self.assertRaises(TypeError):
+            nirvana.evaluate(np.array([(2, 3)], dtype=np.int32), 2, np.array([4], dtype=np.int32), words, b'12345678')
+
+    def test_types(self):
+        out = np.empty((1, 1), dtype=np.uint64)
+        words = np.array([[1, 0]], dtype=np.uint64)
+        gates = np.array([(2, 3), (4, 4)], dtype=np.int32)
+        outputs = np.array([5], dtype=np.int32)
+        for (bad, args) in [
+            ('gates', (gates.astype(np.int64), 2, outputs, words, out)),
+            ('outputs', (gates, 2, outputs.astype(np.int64), words, out)),
+            ('inputs', (gates, 2, outputs, words.astype(np.int64), out)),
+            ('inputs', (gates, 2, outputs, words.view(np.float64), out)),
+            ('out', (gates, 2, outputs, words, out.astype(np.int64))),
+            ('gates', (gates.tobytes(), 2, outputs, words, out)),
+            ('gates', (gates[:, ::-1], 2, outputs, words, out)),
+        ]:
+            with self.assertRaises((ValueError, BufferError), msg=bad):
+                nirvana.evaluate(*args)
+        nirvana.evaluate(gates.astype('<i4'), 2, outputs, words.astype('<u8'), out)
+        self.assertEqual(0, int(out[0, 0]) & 1)
+
+
+class TestBatchEvaluator(unittest.TestCase):
+    def test_matches_netlist(self):
+        rng = np.random.default_rng(9)
+        for chip in [Xor, Mux8Way16, alu]:
+            evaluator = BatchEvaluator.for_chip(chip)
+            bits = rng.random((150, evaluator.netlist.n_inputs)) < 0.5
+            expected = [evaluator.netlist.evaluate_outputs(row) for row in bits]
+            np.testing.assert_array_equal(expected, evaluator.evaluate(bits), chip.__name__)
+
+    def test_threads(self):
+        rng = np.random.default_rng(4)
+        evaluator = BatchEvaluator.for_chip(alu)
+        bits = rng.random((64*40, evaluator.netlist.n_inputs)) < 0.5
+        expected = evaluator.evaluate(bits)
+        with ThreadPoolExecutor(4) as executor:
+            words = rng.integers(0, 2**63, (40, evaluator.netlist.n_inputs), dtype=np.uint64)
+            np.testing.assert_array_equal(
+                evaluator.evaluate_words(words),
+                evaluator.evaluate_words_parallel(words, executor, chunk=3))
+            np.testing.assert_array_equal(expected, evaluator.evaluate(bits, executor))
+
+    def test_tracing(self):
+        # tracing a chip in another thread leaves the batches untouched
+        rng = np.random.default_rng(5)
+        evaluator = BatchEvaluator.for_chip(alu)
+        bits = rng.random((64*4, evaluator.netlist.n_inputs)) < 0.5
+        expected = evaluator.evaluate(bits)
+        done = threading.Event()
+
+        def tracing():
+            try:
+                for _ in range(20):
+                    trace(alu)
+            finally:
+                done.set()
+        # switch threads often enough for the tracing to be interleaved
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-5)
+        thread = threading.Thread(target=tracing)
+        try:
+            thread.start()
+            with ThreadPoolExecutor(4) as executor:
+                while not done.is_set():
+                    np.testing.assert_array_equal(expected, evaluator.evaluate(bits))
+                    np.testing.assert_array_equal(expected, evaluator.evaluate(bits, executor))
+        finally:
+            thread.join()
+            sys.setswitchinterval(interval)
+
+    def test_empty(self):
+        evaluator = BatchEvaluator.for_chip(Xor)
+        self.assertEqual((0, 1), evaluator.evaluate(np.zeros((0, 2), dtype=bool)).shape)
+        self.assertEqual((0, 1), evaluator.evaluate_words_parallel(np.zeros((0, 2), dtype=np.uint64)).shape)
+
+    def test_bad_shape(self):
+        with self.assertRaises(ValueError):
+            BatchEvaluator.for_chip(Xor).evaluate_words(np.zeros((1, 3), dtype=np.uint64))
+
+
+if __name__ == '__main__':
+    unittest.main()
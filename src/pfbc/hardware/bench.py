@@ -0,0 +1,253 @@
+"""
+bench.py benchmarks the hardware layer, such that
+the effect of every optimization can be measured,
+and every regression noticed.
+
+It measures:
+
+- the number of calls per second of the NAND gate from nirvana;
+- the number of evaluations per second of every chip
+  in chips.py and alu.py, at gate-level;
+- the number of ALU evaluations per second for the faster
+  implementations (compiled netlist, native, batch and levelized);
+- the memory used per 16-bit bus value, being the memory
+  of the lookup tables of codec.py per word they hold.
+
+Results are written as JSON and can be compared against
+a baseline written earlier by the same script:
+
+```
+python -m pfbc.hardware.bench --output bench.json --baseline baseline.json
+```
+
+The script exits with status 1 if any result is worse than
+its baseline by more than the given threshold (10% by default).
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from pfbc.hardware import nirvana, native, codec
+from pfbc.hardware.alu import alu
+from pfbc.hardware.batch import BatchEvaluator
+from pfbc.hardware.fidelity import CHIPS
+from pfbc.hardware.levelized import LevelizedSimulator
+from pfbc.hardware.netlist import trace, random_args
+
+
+class Result(NamedTuple):
+    name: str
+    value: float
+    unit: str
+    higher_is_better: bool = True
+
+
+class Benchmark(NamedTuple):
+    """
+    A benchmark, set up (chips traced and so on) by run itself,
+    such that only the benchmarks actually run pay for it.
+    """
+    name: str
+    run: Callable[[float], Result]
+
+
+def _throughput(fn: Callable[[], int], min_time: float, repeat: int = 3) -> float:
+    """
+    Best number of operations per second over a few rounds,
+    each round calling fn, which returns the number of operations
+    it did, until at least min_time seconds have passed.
+    """
+    best = 0.0
+    for _ in range(repeat):
+        ops, start = 0, time.perf_counter()
+        while True:
+            ops += fn()
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = max(best, ops / elapsed)
+    return best
+
+
+def _rng(seed: int, name: str) -> random.Random:
+    # one generator per benchmark, such that its inputs
+    # do not depend on the other benchmarks run
+    return random.Random(f"{seed} {name}")
+
+
+def _calls(name: str, setup: Callable[[], Tuple[Callable, Sequence[tuple]]]) -> Benchmark:
+    def run(min_time: float) -> Result:
+        chip, args = setup()
+
+        def loop():
+            for a in args:
+                chip(*a)
+            return len(args)
+        return Result(name, _throughput(loop, min_time), 'calls/s')
+    return Benchmark(name, run)
+
+
+def _batch(name: str, setup: Callable[[], Union[BatchEvaluator, LevelizedSimulator]], seed: int) -> Benchmark:
+    def run(min_time: float) -> Result:
+        evaluator = setup()
+        rng = np.random.default_rng(_rng(seed, name).getrandbits(32))
+        bits = rng.random((1 << 14, evaluator.netlist.n_inputs)) < 0.5
+
+        def loop():
+            evaluator.evaluate(bits)
+            return len(bits)
+        return Result(name, _throughput(loop, min_time), 'calls/s')
+    return Benchmark(name, run)
+
+
+def _nand() -> Benchmark:
+    args = [(a, b) for a in (False, True) for b in (False, True)] * 64
+    return _calls('nirvana.nand', lambda: (nirvana.nand, args))
+
+
+def _chip(chip: Callable, seed: int) -> Benchmark:
+    name = chip.__name__
+    return _calls(name, lambda: (chip, random_args(trace(chip).widths, _rng(seed, name), 64)))
+
+
+def _alu_netlist(seed: int) -> Benchmark:
+    def setup():
+        netlist = trace(alu)
+        return netlist.compile(), random_args(netlist.widths, _rng(seed, 'alu[netlist]'), 64)
+    return _calls('alu[netlist]', setup)
+
+
+def _alu_native(seed: int) -> Benchmark:
+    return _calls('alu[native]', lambda: (
+        native.alu, random_args(trace(native.alu).widths, _rng(seed, 'alu[native]'), 64)))
+
+
+def _alu_batch(seed: int) -> Benchmark:
+    return _batch('alu[batch]', lambda: BatchEvaluator(trace(alu)), seed)
+
+
+def _alu_levelized(seed: int) -> Benchmark:
+    return _batch('alu[levelized]', lambda: LevelizedSimulator(trace(alu)), seed)
+
+
+def _bus_memory() -> Benchmark:
+    def run(min_time: float) -> Result:
+        # to_bus16 returns the buses shared by its lookup tables,
+        # such that the memory of a bus is that of the tables,
+        # amortised over the 65536 words they hold
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            buses = codec._buses()
+            words = codec._words(buses)
+            after = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        return Result('Bus16 memory', (after - before) / len(buses), 'bytes', higher_is_better=False)
+    return Benchmark('Bus16 memory', run)
+
+
+def benchmarks(seed: int = 0) -> List[Benchmark]:
+    return [_nand()] + \
+        [_chip(chip, seed) for chip in CHIPS] + \
+        [_alu_netlist(seed), _alu_native(seed), _alu_batch(seed), _alu_levelized(seed), _bus_memory()]
+
+
+def run(selected: Optional[Sequence[str]] = None, min_time: float = 0.2) -> Dict[str, Result]:
+    """
+    Runs all benchmarks, or only those whose name contains
+    any of the given strings.
+    """
+    results = {}
+    for bench in benchmarks():
+        if selected and not any(s in bench.name for s in selected):
+            continue
+        results[bench.name] = bench.run(min_time)
+    return results
+
+
+def save(results: Dict[str, Result], path: str):
+    data = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': {
+            name: {'value': r.value, 'unit': r.unit, 'higher_is_better': r.higher_is_better}
+            for (name, r) in results.items()},
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def load(path: str) -> Dict[str, Result]:
+    with open(path) as f:
+        data = json.load(f)
+    return {
+        name: Result(name, r['value'], r['unit'], r.get('higher_is_better', True))
+        for (name, r) in data['results'].items()}
+
+
+def compare(results: Dict[str, Result], baseline: Dict[str, Result], threshold: float) -> List[str]:
+    """
+    Names of the results that are worse than their baseline
+    by more than the threshold (a fraction of the baseline).
+    """
+    regressions = []
+    for (name, r) in results.items():
+        base = baseline.get(name)
+        if base is None or not base.value:
+            continue
+        change = (r.value - base.value) / base.value
+        if not r.higher_is_better:
+            change = -change
+        if change < -threshold:
+            regressions.append(name)
+    return regressions
+
+
+def _report(results: Dict[str, Result], baseline: Dict[str, Result]) -> str:
+    lines = []
+    for (name, r) in results.items():
+        line = f"{name:<16} {r.value:>16,.1f} {r.unit:<8}"
+        base = baseline.get(name)
+        if base is not None and base.value:
+            line += f" {(r.value - base.value) / base.value:>+8.1%}"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def main(argv: Sequence[str]) -> int:
+    parser = argparse.ArgumentParser(prog='python -m pfbc.hardware.bench', description=__doc__.split('\n\n')[0])
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--baseline', help="compare against the results in this file, if it exists")
+    parser.add_argument('--threshold', type=float, default=0.1, help="allowed regression (default 0.1)")
+    parser.add_argument('--min-time', type=float, default=0.2, help="minimum seconds per round")
+    parser.add_argument('benchmarks', nargs='*', help="only run benchmarks containing these names")
+    args = parser.parse_args(argv)
+
+    results = run(args.benchmarks, args.min_time)
+    baseline = {}
+    if args.baseline and os.path.exists(args.baseline):
+        baseline = load(args.baseline)
+    print(_report(results, baseline))
+    if args.output:
+        save(results, args.output)
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"regressions beyond {args.threshold:.0%}: {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,65 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from pfbc.hardware import bench
+from pfbc.hardware.bench import \
+    Result, run, save, load, compare, main
+
+
+class TestBench(unittest.TestCase):
+    def test_run(self):
+        results = run(['nirvana.nand', 'memory'], min_time=0.001)
+        self.assertEqual(['nirvana.nand', 'Bus16 memory'], list(results))
+        self.assertGreater(results['nirvana.nand'].value, 0)
+        self.assertFalse(results['Bus16 memory'].higher_is_better)
+        self.assertGreater(results['Bus16 memory'].value, 100)
+
+    def test_lazy(self):
+        # the benchmarks not selected are never set up
+        with mock.patch.object(bench, 'trace', side_effect=AssertionError('traced')):
+            names = [b.name for b in bench.benchmarks()]
+            self.assertEqual(['nirvana.nand'], list(run(['nirvana.nand'], min_time=0.001)))
+        self.assertIn('alu', names)
+        self.assertIn('alu[levelized]', names)
+
+    def test_save_load(self):
+        results = {'x': Result('x', 12.5, 'calls/s'), 'y': Result('y', 3.0, 'bytes', False)}
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'bench.json')
+            save(results, path)
+            self.assertEqual(results, load(path))
+
+    def test_compare(self):
+        baseline = {
+            'fast': Result('fast', 100.0, 'calls/s'),
+            'small': Result('small', 100.0, 'bytes', False),
+        }
+        self.assertEqual([], compare({
+            'fast': Result('fast', 95.0, 'calls/s'),
+            'small': Result('small', 105.0, 'bytes', False),
+            'new': Result('new', 1.0, 'calls/s'),
+        }, baseline, 0.1))
+        self.assertEqual(['fast', 'small'], compare({
+            'fast': Result('fast', 85.0, 'calls/s'),
+            'small': Result('small', 115.0, 'bytes', False),
+        }, baseline, 0.1))
+
+    def test_main_exit_status(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'baseline.json')
+            save({'nirvana.nand': Result('nirvana.nand', 1e12, 'calls/s')}, path)
+            args = ['--min-time', '0.001', '--baseline', path, 'nirvana.nand']
+            with open(os.devnull, 'w') as devnull:
+                stdout, stderr, sys.stdout, sys.stderr = sys.stdout, sys.stderr, devnull, devnull
+                try:
+                    self.assertEqual(1, main(args))
+                    self.assertEqual(0, main(['--threshold', '1.0'] + args))
+                finally:
+                    sys.stdout, sys.stderr = stdout, stderr
+
+
+if __name__ == '__main__':
+    unittest.main()
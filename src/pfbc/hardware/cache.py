@@ -0,0 +1,238 @@
+"""
+cache.py keeps the artifacts that take a while to build from the chips
+on disk, precompiled, such that short-lived programs (running a single
+test script, say) don't build them again on every run:
+
+- the netlist of a chip (see netlist.py), its gates, outputs
+  and scopes stored as arrays of 32-bit integers;
+- the evaluator of a chip: the code object of its compiled netlist,
+  as marshalled by Python.
+
+Every artifact is a single compact binary file,
+mmap'd when loaded for the first time:
+
+- magic: b'PFBC' followed by the format version (uint32);
+- key: the SHA-256 of the sources of the chips, of the Python version
+  and byte order, and of the name of the artifact;
+- header: its length (uint32) followed by JSON, padded to 4 bytes;
+- payload: the integer arrays, or the marshalled code object.
+
+An artifact with another key is stale, as the chips changed since
+(or Python did), and is rebuilt as if it were missing.
+
+The cache lives in the __cache__ directory of this package, unless
+the PFBC_CACHE environment variable points elsewhere. Artifacts built
+on a miss are only written to it if it exists. It is populated, before
+installing the package, by running:
+
+    python -m pfbc.hardware.cache
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import marshal
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from pfbc.hardware.netlist import Netlist, trace, function
+
+
+MAGIC = b'PFBC'
+VERSION = 1
+
+# the modules every chip is built from, next to its own
+SOURCES = ('chips.py', 'alu.py', 'mul.py', 'netlist.py')
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+_PREFIX = struct.Struct('<4sI32sI')
+_digests: Dict[str, bytes] = {}
+
+
+def directory() -> str:
+    return os.environ.get('PFBC_CACHE') or os.path.join(_HERE, '__cache__')
+
+
+def _digest(path: str) -> bytes:
+    if path not in _digests:
+        with open(path, 'rb') as f:
+            _digests[path] = hashlib.sha256(f.read()).digest()
+    return _digests[path]
+
+
+def key(kind: str, chip: Callable) -> bytes:
+    """
+    The key an artifact of a chip is valid for.
+    """
+    h = hashlib.sha256()
+    h.update(f"{VERSION} {sys.implementation.cache_tag} {sys.byteorder} {kind} {_name(chip)}".encode())
+    paths = [os.path.join(_HERE, source) for source in SOURCES]
+    own = inspect.getsourcefile(chip)
+    if own is not None and os.path.abspath(own) not in paths:
+        paths.append(own)
+    for path in paths:
+        h.update(_digest(path))
+    return h.digest()
+
+
+def _name(chip: Callable) -> str:
+    return f"{chip.__module__.rsplit('.', 1)[-1]}.{chip.__name__}"
+
+
+def path(kind: str, chip: Callable, where: Optional[str] = None) -> str:
+    return os.path.join(where or directory(), f"{kind}-{_name(chip)}.bin")
+
+
+def write(filename: str, k: bytes, header: Dict[str, Any], payload: bytes):
+    """
+    Writes an artifact, replacing any previous one at once.
+    """
+    head = json.dumps(header, separators=(',', ':')).encode()
+    head += b' ' * (-len(head) % 4)
+    tmp = f"{filename}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(_PREFIX.pack(MAGIC, VERSION, k, len(head)))
+        f.write(head)
+        f.write(payload)
+    os.replace(tmp, filename)
+
+
+def read(filename: str, k: bytes) -> Optional[Tuple[Dict[str, Any], mmap.mmap, int]]:
+    """
+    Maps an artifact, returning its header, the mmap and the offset
+    of its payload, or None if it is missing or stale.
+    """
+    try:
+        with open(filename, 'rb') as f:
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(m) < _PREFIX.size:
+        m.close()
+        return None
+    magic, version, found, size = _PREFIX.unpack_from(m)
+    if magic != MAGIC or version != VERSION or found != k or len(m) < _PREFIX.size + size:
+        m.close()
+        return None
+    header = json.loads(m[_PREFIX.size:_PREFIX.size + size])
+    return header, m, _PREFIX.size + size
+
+
+def _store(filename: str, k: bytes, header: Dict[str, Any], payload: bytes):
+    if os.path.isdir(os.path.dirname(filename)):
+        try:
+            write(filename, k, header, payload)
+        except OSError:
+            pass
+
+
+def _tuples(shape):
+    return tuple(_tuples(s) for s in shape) if isinstance(shape, list) else shape
+
+
+def _encode_netlist(netlist: Netlist) -> Tuple[Dict[str, Any], bytes]:
+    scopes = list(dict.fromkeys(netlist.scopes))
+    index = {scope: i for (i, scope) in enumerate(scopes)}
+    words = array('i', [wire for gate in netlist.gates for wire in gate])
+    words.extend(netlist.outputs)
+    words.extend(index[scope] for scope in netlist.scopes)
+    header = {
+        'name': netlist.name,
+        'widths': list(netlist.widths),
+        'shape': netlist.shape,
+        'gates': len(netlist.gates),
+        'outputs': len(netlist.outputs),
+        'scopes': scopes,
+    }
+    return header, words.tobytes()
+
+
+def _decode_netlist(header: Dict[str, Any], m: mmap.mmap, offset: int) -> Netlist:
+    n, k = header['gates'], header['outputs']
+    view = memoryview(m)[offset:offset + 4 * (3*n + k)]
+    words = view.cast('i')
+    try:
+        gates = list(zip(words[0:2*n:2], words[1:2*n:2]))
+        outputs = words[2*n:2*n + k].tolist()
+        scopes = [tuple(scope) for scope in header['scopes']]
+        gate_scopes = [scopes[i] for i in words[2*n + k:]]
+    finally:
+        words.release()
+        view.release()
+    return Netlist(header['name'], tuple(header['widths']), gates, outputs, _tuples(header['shape']), gate_scopes)
+
+
+def netlist(chip: Callable, where: Optional[str] = None) -> Netlist:
+    """
+    The netlist of a chip, from the cache if possible.
+    """
+    filename, k = path('netlist', chip, where), key('netlist', chip)
+    found = read(filename, k)
+    if found is not None:
+        header, m, offset = found
+        try:
+            return _decode_netlist(header, m, offset)
+        finally:
+            m.close()
+    result = trace(chip)
+    _store(filename, k, *_encode_netlist(result))
+    return result
+
+
+def evaluator(chip: Callable, where: Optional[str] = None) -> Callable:
+    """
+    The compiled netlist of a chip (see Netlist.compile),
+    from the cache if possible.
+    """
+    filename, k = path('evaluator', chip, where), key('evaluator', chip)
+    found = read(filename, k)
+    if found is not None:
+        header, m, offset = found
+        try:
+            code = marshal.loads(m[offset:])
+        finally:
+            m.close()
+        return function(code, header['name'])
+    compiled = netlist(chip, where)
+    code = compiled.code()
+    _store(filename, k, {'name': compiled.name}, marshal.dumps(code))
+    return function(code, compiled.name)
+
+
+def build(chips: Sequence[Callable], where: Optional[str] = None) -> List[str]:
+    """
+    Builds (or rebuilds) the artifacts of the given chips,
+    returning the files written.
+    """
+    where = where or directory()
+    os.makedirs(where, exist_ok=True)
+    written = []
+    for chip in chips:
+        compiled = trace(chip)
+        filename = path('netlist', chip, where)
+        write(filename, key('netlist', chip), *_encode_netlist(compiled))
+        written.append(filename)
+        filename = path('evaluator', chip, where)
+        write(filename, key('evaluator', chip), {'name': compiled.name}, marshal.dumps(compiled.code()))
+        written.append(filename)
+    return written
+
+
+def main(argv: Sequence[str]) -> int:
+    from pfbc.hardware.fidelity import CHIPS
+
+    parser = argparse.ArgumentParser(prog='python -m pfbc.hardware.cache', description=__doc__.split('\n\n')[0])
+    parser.add_argument('--directory', help=f"the cache directory, {directory()} by default")
+    args = parser.parse_args(argv)
+    written = build(CHIPS, args.directory)
+    print(f"{len(written)} artifacts written to {args.directory or directory()}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
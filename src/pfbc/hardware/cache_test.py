@@ -0,0 +1,93 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from pfbc.hardware import cache, chips
+from pfbc.hardware.alu import alu
+from pfbc.hardware.codec import to_bus16
+from pfbc.hardware.netlist import trace
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.directory = self._directory.name
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_build(self):
+        written = cache.build([chips.Mux, alu], self.directory)
+        self.assertEqual(4, len(written))
+        self.assertEqual(sorted(written), sorted(os.path.join(self.directory, f) for f in os.listdir(self.directory)))
+
+        expected = trace(alu)
+        netlist = cache.netlist(alu, self.directory)
+        for attribute in ['name', 'widths', 'gates', 'outputs', 'shape', 'scopes']:
+            self.assertEqual(getattr(expected, attribute), getattr(netlist, attribute), attribute)
+
+        evaluator = cache.evaluator(alu, self.directory)
+        self.assertEqual('alu', evaluator.__name__)
+        x, y = to_bus16(12345), to_bus16(54321)
+        flags = (False, True, False, False, True, True)
+        self.assertEqual(alu(x, y, *flags), evaluator(x, y, *flags))
+
+    def test_miss(self):
+        missing = os.path.join(self.directory, 'missing')
+        self.assertEqual(trace(chips.Xor).gates, cache.netlist(chips.Xor, missing).gates)
+        self.assertTrue(cache.evaluator(chips.Xor, missing)(True, False))
+        self.assertFalse(os.path.exists(missing))
+
+        # built on a miss if the directory exists
+        cache.evaluator(chips.Xor, self.directory)
+        self.assertEqual(2, len(os.listdir(self.directory)))
+        self.assertIsNotNone(cache.read(cache.path('netlist', chips.Xor, self.directory), cache.key('netlist', chips.Xor)))
+
+    def test_stale(self):
+        filename = cache.path('netlist', chips.Xor, self.directory)
+        cache.write(filename, b'x'*32, {}, b'')
+        self.assertIsNone(cache.read(filename, cache.key('netlist', chips.Xor)))
+        self.assertEqual(trace(chips.Xor).gates, cache.netlist(chips.Xor, self.directory).gates)
+        self.assertIsNotNone(cache.read(filename, cache.key('netlist', chips.Xor)))
+
+        with open(filename, 'wb') as f:
+            f.write(b'PFBC')
+        self.assertIsNone(cache.read(filename, cache.key('netlist', chips.Xor)))
+        self.assertNotEqual(cache.key('netlist', chips.Xor), cache.key('evaluator', chips.Xor))
+        self.assertNotEqual(cache.key('netlist', chips.Xor), cache.key('netlist', chips.And))
+
+    def test_main(self):
+        with open(os.devnull, 'w') as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                self.assertEqual(0, cache.main(['--directory', self.directory]))
+            finally:
+                sys.stdout = stdout
+        self.assertTrue(os.path.exists(cache.path('evaluator', alu, self.directory)))
+
+
+class TestLazy(unittest.TestCase):
+    def test_import(self):
+        script = (
+            "import sys, pfbc\n"
+            "assert 'pfbc.hardware' not in sys.modules\n"
+            "assert pfbc.hardware.chips.And(True, True)\n"
+            "assert 'pfbc.hardware.alu' not in sys.modules\n"
+            "import pfbc.hardware.fidelity\n"
+            "assert 'numpy' not in sys.modules\n"
+            "assert 'fidelity' in dir(pfbc.hardware)\n"
+            "try:\n"
+            "    pfbc.hardware.nothing\n"
+            "except AttributeError:\n"
+            "    pass\n"
+            "else:\n"
+            "    raise AssertionError\n"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        subprocess.run([sys.executable, '-c', script], cwd=root, check=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
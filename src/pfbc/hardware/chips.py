@@ -31,10 +31,17 @@ to build a 16-bit computer starting from a NAND
 gate and building up, as if it were a real physical
 computer. As to demystify the complex system
 a modern computer really is.
+
+The chips call the NAND gate through `gates`, which holds
+nirvana's NAND gate unless a thread is tracing a chip (see netlist.py).
+Tracing swaps the gate of the tracing thread only, such that it never
+affects the chips evaluated by any other.
 """
 
 
-from typing import Tuple, NewType
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator, Tuple, NewType
 
 from pfbc.hardware import nirvana
 
@@ -55,6 +62,45 @@ Bus3 = Tuple[Bit, Bit, Bit]
 Bus2 = Tuple[Bit, Bit]
 
 
+class _Gates:
+    """
+    The NAND gate the chips are built from. While any thread
+    uses a gate of its own, every NAND goes through the gate
+    of the calling thread, nirvana's by default.
+    """
+
+    def __init__(self):
+        self.nand: Callable = nirvana.nand
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._users = 0
+
+    def _dispatch(self, a, b):
+        return getattr(self._local, 'nand', nirvana.nand)(a, b)
+
+    @contextmanager
+    def using(self, nand: Callable) -> Iterator[None]:
+        """
+        Temporarily swaps the NAND gate of the calling thread.
+        """
+        previous = getattr(self._local, 'nand', nirvana.nand)
+        self._local.nand = nand
+        with self._lock:
+            self._users += 1
+            self.nand = self._dispatch
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._users -= 1
+                if not self._users:
+                    self.nand = nirvana.nand
+            self._local.nand = previous
+
+
+gates = _Gates()
+
+
 def __fanOut16(bit: Bit) -> Bus16:
     """
     Use a single bit for multiple inputs (called a bus).
@@ -76,7 +122,7 @@ def Not(i: Bit) -> Bit:
          +--------+  
     ```
     """
-    return nirvana.nand(i, i)
+    return gates.nand(i, i)
 
 
 def And(a: Bit, b: Bit) -> Bit:
@@ -95,7 +141,7 @@ def And(a: Bit, b: Bit) -> Bit:
          +--------+   +-------+
     ```
     """
-    out = nirvana.nand(a, b)
+    out = gates.nand(a, b)
     return Not(out)
 
 
@@ -122,7 +168,7 @@ def Or(a: Bit, b: Bit) -> Bit:
     """
     x = Not(a)
     y = Not(b)
-    return nirvana.nand(x, y)
+    return gates.nand(x, y)
 
 
 def Xor(a: Bit, b: Bit) -> Bit:
@@ -145,7 +191,7 @@ def Xor(a: Bit, b: Bit) -> Bit:
                   +------+
     ```
     """
-    x = nirvana.nand(a, b)
+    x = gates.nand(a, b)
     y = Or(a, b)
     return And(x, y)
 
@@ -598,5 +644,5 @@ def DMux8Way(i: Bit, s: Bus3) -> Bus8:
        a  b  c  d           e  f  g  h
     ```
     """
-    return DMux4Way(And(Not(s[0]), i), s[1:]) + \
-        DMux4Way(And(s[0], i), s[1:])
+    return DMux4Way(And(Not(s[2]), i), s[:2]) + \
+        DMux4Way(And(s[2], i), s[:2])
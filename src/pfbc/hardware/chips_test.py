@@ -1,4 +1,4 @@
-from itertools import combinations_with_replacement
+from itertools import combinations_with_replacement, product
 import unittest
 
 from pfbc.hardware import nirvana
@@ -82,7 +82,7 @@ class TestChipsMulti(unittest.TestCase):
             self.assertEqual(out, DMux4Way(i, (s0, s1)))
 
     def test_dmux8way(self):
-        for (i, s0, s1, s2) in combinations_with_replacement([False, True], 4):
+        for (i, s0, s1, s2) in product([False, True], repeat=4):
             n = int(s2)<<2 | int(s1)<<1 | int(s0)
             out = tuple([0]*n + [i] + [0]*(7-n))
             self.assertEqual(out, DMux8Way(i, (s0, s1, s2)))
@@ -0,0 +1,208 @@
+"""
+clock.py runs a machine (see machine.py) on an asyncio event loop,
+next to the devices it talks to.
+
+The CPU runs in slices: a batch of instructions executed in one go
+by Machine.run, after which control goes back to the event loop.
+Between two slices the other tasks get their turn:
+
+- the keyboard task polls the key currently pressed at a fixed rate,
+  and writes it into the memory map of the keyboard;
+- the screen task takes a snapshot of the memory map of the screen
+  at a fixed rate, and passes it to the display.
+
+Neither task ever interrupts a slice, and a slow display
+(a coroutine awaiting a terminal or a socket) only delays the
+next refresh, not the CPU. Slices are kept short enough in time
+(slice_seconds, or less for devices polled at a higher rate) for the
+devices to be serviced at their rate, a device served late being
+due again one period after it was due, not after it was served.
+
+Without a target frequency the CPU runs as fast as it can, every
+slice executing the instructions the host runs in that time,
+as measured over the previous slice. With one, every slice executes
+the instructions of that time of clock, after which the CPU
+sleeps until the wall clock catches up.
+A machine that is done (halted, or spinning in its final loop)
+sleeps until stopped, keeping its screen up, rather than spinning
+on the host as well.
+"""
+
+import asyncio
+import inspect
+import time
+from typing import Awaitable, Callable, List, Optional, Union
+
+from pfbc.hardware.machine import Machine
+
+
+Display = Callable[[List[int]], Union[None, Awaitable[None]]]
+
+# the instructions of the first slice run without a target frequency,
+# before the speed of the host is known
+PROBE = 1000
+
+
+def _next(due: float, period: float, now: float) -> float:
+    # the next time a device is due, keeping to its rate when served
+    # late, unless so late that it would have to catch up in a burst
+    return max(due + period, now)
+
+
+class Clock:
+    """
+    Runs a machine and services its keyboard and screen.
+    """
+
+    def __init__(
+            self,
+            machine: Machine,
+            frequency: Optional[float] = None,
+            slice_instructions: int = 100000,
+            slice_seconds: float = 0.01,
+            keyboard_rate: float = 100.0,
+            screen_rate: float = 30.0,
+            display: Optional[Display] = None,
+            keyboard: Optional[Callable[[], int]] = None):
+        if frequency is not None and frequency <= 0:
+            raise ValueError(f"frequency must be positive, got {frequency}")
+        self.machine = machine
+        self.frequency = frequency
+        self.slice_instructions = slice_instructions
+        self.slice_seconds = slice_seconds
+        self.keyboard_rate = keyboard_rate
+        self.screen_rate = screen_rate
+        self.display = display
+        self.keyboard = keyboard if keyboard is not None else lambda: self.key
+        self.key = 0
+        self.frames = 0
+        # instructions per second measured over the last slice
+        self.speed: Optional[float] = None
+        self._stopped: Optional[asyncio.Event] = None
+
+    def press(self, code: int):
+        """
+        Presses a key, seen by the machine at the next keyboard poll.
+        """
+        self.key = code & 0xFFFF
+
+    def release(self):
+        self.key = 0
+
+    def stop(self):
+        """
+        Stops a running clock at the end of the current slice.
+        """
+        if self._stopped is not None:
+            self._stopped.set()
+
+    @property
+    def slice_time(self) -> float:
+        """
+        The duration of a slice in seconds: slice_seconds, or less
+        for the devices to be serviced at their rate, as a device
+        waiting for its turn may have to wait for two slices.
+        """
+        rates = [self.keyboard_rate] if self.display is None else [self.keyboard_rate, self.screen_rate]
+        return min(self.slice_seconds, 1.0 / (4 * max(rates)))
+
+    @property
+    def slice(self) -> int:
+        """
+        The number of instructions executed per slice,
+        at most slice_instructions.
+        """
+        if self.frequency is not None:
+            n = self.frequency * self.slice_time
+        elif self.speed is not None:
+            n = self.speed * self.slice_time
+        else:
+            n = PROBE
+        return max(1, min(self.slice_instructions, int(n)))
+
+    async def run(self, instructions: Optional[int] = None, duration: Optional[float] = None) -> int:
+        """
+        Runs the machine until stopped, after the given number of
+        instructions (or the end of the program), or after the given
+        duration in seconds, returning the number of instructions executed.
+        """
+        loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        devices = [loop.create_task(self._poll_keyboard())]
+        if self.display is not None:
+            devices.append(loop.create_task(self._refresh_screen()))
+        try:
+            return await self._run_cpu(loop, instructions, duration)
+        finally:
+            for task in devices:
+                task.cancel()
+            await asyncio.gather(*devices, return_exceptions=True)
+            self._stopped = None
+
+    async def _run_cpu(self, loop, instructions: Optional[int], duration: Optional[float]) -> int:
+        machine, stopped = self.machine, self._stopped
+        start = loop.time()
+        deadline = None if duration is None else start + duration
+        done = 0
+        while not stopped.is_set():
+            if instructions is not None and done >= instructions:
+                break
+            if deadline is not None and loop.time() >= deadline:
+                break
+            if machine.halted or machine.spinning:
+                if instructions is not None:
+                    break
+                await self._idle(loop, deadline)
+                continue
+            n = self.slice
+            if instructions is not None:
+                n = min(n, instructions - done)
+            started = time.perf_counter()
+            executed = machine.run(n)
+            elapsed = time.perf_counter() - started
+            if executed and elapsed > 0:
+                self.speed = executed / elapsed
+            done += executed
+            ahead = 0.0
+            if self.frequency is not None:
+                ahead = start + done / self.frequency - loop.time()
+                if deadline is not None:
+                    ahead = min(ahead, deadline - loop.time())
+            # always yield, if only to let the devices run
+            await asyncio.sleep(max(ahead, 0.0))
+        return done
+
+    async def _idle(self, loop, deadline: Optional[float]):
+        timeout = None if deadline is None else max(deadline - loop.time(), 0.0)
+        try:
+            await asyncio.wait_for(self._stopped.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _poll_keyboard(self):
+        period = 1.0 / self.keyboard_rate
+        loop = asyncio.get_running_loop()
+        due = loop.time()
+        while True:
+            self.machine.keyboard = self.keyboard()
+            due = _next(due, period, loop.time())
+            await asyncio.sleep(due - loop.time())
+
+    async def _refresh_screen(self):
+        period = 1.0 / self.screen_rate
+        loop = asyncio.get_running_loop()
+        due = loop.time()
+        while True:
+            result = self.display(self.machine.screen())
+            if inspect.isawaitable(result):
+                await result
+            self.frames += 1
+            due = _next(due, period, loop.time())
+            await asyncio.sleep(due - loop.time())
+
+
+def run(machine: Machine, instructions: Optional[int] = None, duration: Optional[float] = None, **options) -> int:
+    """
+    Runs a machine on a new event loop, see Clock for the options.
+    """
+    return asyncio.run(Clock(machine, **options).run(instructions, duration))
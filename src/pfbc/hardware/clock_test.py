@@ -0,0 +1,69 @@
+import asyncio
+import time
+import unittest
+
+from pfbc.hardware.clock import Clock, run
+from pfbc.hardware.machine import Machine, KBD, SCREEN, instruction
+
+
+# copies the keyboard to the first word of the screen, for ever
+ECHO = [KBD, instruction('M', 'D'), SCREEN, instruction('D', 'M'), 0, instruction('0', jump='JMP')]
+END = [0, instruction('0', jump='JMP')]
+
+
+class TestClock(unittest.TestCase):
+    def test_instructions(self):
+        machine = Machine(ECHO)
+        self.assertEqual(1000, run(machine, instructions=1000, slice_instructions=64))
+        self.assertEqual(1000, machine.cycles)
+
+    def test_devices(self):
+        frames = []
+
+        async def display(screen):
+            await asyncio.sleep(0)
+            frames.append(screen[0])
+
+        async def main():
+            clock = Clock(Machine(ECHO), slice_instructions=1000, keyboard_rate=1000, screen_rate=200, display=display)
+            clock.press(ord('A'))
+            task = asyncio.ensure_future(clock.run())
+            await asyncio.sleep(0.1)
+            clock.stop()
+            await task
+            return clock
+
+        clock = asyncio.run(main())
+        self.assertIn(ord('A'), frames)
+        self.assertGreater(clock.frames, 1)
+        self.assertEqual(len(frames), clock.frames)
+
+    def test_rates(self):
+        # running freely with the default slices,
+        # the devices are still serviced at their rate
+        polls = []
+        clock = Clock(Machine(ECHO), keyboard=lambda: polls.append(1) or 0, display=lambda screen: None)
+        asyncio.run(clock.run(duration=0.5))
+        self.assertGreater(len(polls), 0.5 * clock.keyboard_rate * 0.7)
+        self.assertGreater(clock.frames, 0.5 * clock.screen_rate * 0.7)
+        self.assertLess(clock.slice, clock.slice_instructions)
+
+    def test_frequency(self):
+        machine = Machine(ECHO)
+        done = run(machine, duration=0.2, frequency=10000, slice_seconds=0.01)
+        self.assertGreater(done, 1000)
+        self.assertLessEqual(done, 2100)
+        with self.assertRaises(ValueError):
+            Clock(machine, frequency=0)
+
+    def test_idle(self):
+        cpu = time.process_time()
+        done = run(Machine(END), duration=0.2)
+        self.assertEqual(0, done)
+        self.assertLess(time.process_time() - cpu, 0.1)
+        # the end of the program ends a bounded run
+        self.assertEqual(2, run(Machine([1, 2]), instructions=10))
+
+
+if __name__ == '__main__':
+    unittest.main()
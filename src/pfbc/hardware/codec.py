@@ -0,0 +1,173 @@
+"""
+codec.py converts between integers and the bus values
+taken and returned by the chips.
+
+A 16-bit word converts to a Bus16 (and back) through lookup tables
+holding all 65536 possible buses, built on first use. Besides being
+fast, every bus returned is shared with all other conversions
+of the same word, which keeps a RAM dump of buses cheap.
+
+Whole arrays of integers convert to bit matrices (and back)
+using NumPy, with one row per integer and the most significant bit
+in the first column, matching the order of the data buses.
+
+Simulators evaluating many input vectors at once instead pack
+the vectors into lanes: bit j of the k-th 64-bit word of a row
+holds that row for the (64*k+j)-th vector.
+
+Words are unsigned, the 16-bit computer however uses
+two's complement to represent negative numbers,
+which is what the signed helpers convert to and from.
+
+NumPy is only imported by the functions using it, such that
+programs converting single words don't pay for importing it.
+"""
+
+from itertools import product
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from pfbc.hardware.chips import Bus16
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+_BUS16: Optional[Tuple[Bus16, ...]] = None
+_WORD16: Optional[Dict[Bus16, int]] = None
+
+
+def _buses() -> Tuple[Bus16, ...]:
+    # product yields the halves in counting order,
+    # such that bus n holds the binary digits of n
+    halves = tuple(product((False, True), repeat=8))
+    return tuple([high + low for high in halves for low in halves])
+
+
+def _words(buses: Tuple[Bus16, ...]) -> Dict[Bus16, int]:
+    return dict(zip(buses, range(len(buses))))
+
+
+def _build_buses():
+    global _BUS16
+    _BUS16 = _buses()
+
+
+def _build_words():
+    global _WORD16
+    if _BUS16 is None:
+        _build_buses()
+    _WORD16 = _words(_BUS16)
+
+
+def to_bus16(n: int) -> Bus16:
+    """
+    Converts an integer into a 16-bit bus, ignoring the bits
+    beyond the 16 least significant ones.
+    """
+    if _BUS16 is None:
+        _build_buses()
+    return _BUS16[n & 0xFFFF]
+
+
+def from_bus16(a: Bus16) -> int:
+    """
+    Converts a 16-bit bus into an unsigned integer.
+    """
+    if _WORD16 is None:
+        _build_words()
+    try:
+        return _WORD16[a]
+    except (KeyError, TypeError):
+        # lists, or bits that are truthy without being True or 1
+        return _WORD16[tuple(bool(x) for x in a)]
+
+
+def to_signed16(n: int) -> int:
+    """
+    Interprets a 16-bit word as a two's complement integer.
+    """
+    n &= 0xFFFF
+    return n - 0x10000 if n & 0x8000 else n
+
+
+def from_signed16(n: int) -> int:
+    """
+    Converts an integer in [-32768, 65535] into its 16-bit word.
+    """
+    if not -0x8000 <= n <= 0xFFFF:
+        raise OverflowError(f"{n} does not fit in 16 bits")
+    return n & 0xFFFF
+
+
+def ints_to_bits(values, width: int = 16) -> 'np.ndarray':
+    """
+    Converts an array of integers into a boolean matrix
+    of shape (len(values), width), most significant bit first.
+    Negative integers are converted as two's complement.
+    """
+    import numpy as np
+    values = np.asarray(values, dtype=np.int64).reshape(-1)
+    if width == 16:
+        words = (values & 0xFFFF).astype('>u2')
+        return np.unpackbits(words.view(np.uint8).reshape(-1, 2), axis=1).astype(bool)
+    shifts = np.arange(width-1, -1, -1, dtype=np.int64)
+    return ((values[:, None] >> shifts) & 1).astype(bool)
+
+
+def bits_to_ints(bits: 'np.ndarray') -> 'np.ndarray':
+    """
+    Converts a boolean matrix with one row of bits per integer,
+    most significant bit first, into an array of unsigned integers.
+    """
+    import numpy as np
+    bits = np.asarray(bits, dtype=bool)
+    width = bits.shape[1]
+    if width == 16:
+        return np.packbits(bits, axis=1).view('>u2').reshape(-1).astype(np.int64)
+    weights = np.left_shift(1, np.arange(width-1, -1, -1, dtype=np.int64))
+    return bits.astype(np.int64) @ weights
+
+
+def to_signed(values) -> 'np.ndarray':
+    """
+    Interprets an array of 16-bit words as two's complement integers.
+    """
+    import numpy as np
+    return np.asarray(values).astype(np.uint16).view(np.int16).astype(np.int64)
+
+
+def to_unsigned(values) -> 'np.ndarray':
+    """
+    Converts an array of integers into their 16-bit words.
+    """
+    import numpy as np
+    return np.asarray(values).astype(np.int64).astype(np.uint16).astype(np.int64)
+
+
+LANES = 64
+
+
+def pack_lanes(bits: 'np.ndarray') -> 'np.ndarray':
+    """
+    Packs a boolean matrix of shape (rows, n) into a matrix of 64-bit words
+    of shape (rows, ceil(n/64)), where bit j of word k in a row holds
+    column 64*k+j of that row. Missing columns are packed as 0.
+    """
+    import numpy as np
+    bits = np.asarray(bits, dtype=bool)
+    rows, n = bits.shape
+    words = -(-n // LANES)
+    padded = np.zeros((rows, words*LANES), dtype=bool)
+    padded[:, :n] = bits
+    return np.packbits(padded, axis=1, bitorder='little').view('<u8')
+
+
+def unpack_lanes(words: 'np.ndarray', n: int) -> 'np.ndarray':
+    """
+    Unpacks the first n columns of a matrix of 64-bit words
+    packed by pack_lanes.
+    """
+    import numpy as np
+    words = np.ascontiguousarray(words, dtype='<u8')
+    bits = np.unpackbits(words.view(np.uint8), axis=1, bitorder='little')
+    return bits[:, :n].astype(bool)
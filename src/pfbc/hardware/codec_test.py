@@ -0,0 +1,77 @@
+import unittest
+
+import numpy as np
+
+from pfbc.hardware.codec import \
+    to_bus16, from_bus16, to_signed16, from_signed16, \
+    ints_to_bits, bits_to_ints, to_signed, to_unsigned, \
+    pack_lanes, unpack_lanes
+
+
+class TestWord16(unittest.TestCase):
+    def test_roundtrip(self):
+        for n in range(0, 0x10000, 97):
+            self.assertEqual(n, from_bus16(to_bus16(n)))
+
+    def test_bit_order(self):
+        self.assertEqual((False,)*15 + (True,), to_bus16(1))
+        self.assertEqual((True,) + (False,)*15, to_bus16(0x8000))
+        self.assertEqual(to_bus16(1), to_bus16(0x10001))
+        self.assertIs(to_bus16(-1), to_bus16(0xFFFF))
+
+    def test_from_other_sequences(self):
+        self.assertEqual(5, from_bus16([0]*13 + [1, 0, 1]))
+        self.assertEqual(5, from_bus16((None,)*13 + (2, '', 'x')))
+
+    def test_signed(self):
+        self.assertEqual(-1, to_signed16(0xFFFF))
+        self.assertEqual(-32768, to_signed16(0x8000))
+        self.assertEqual(32767, to_signed16(0x7FFF))
+        self.assertEqual(0xFFFF, from_signed16(-1))
+        self.assertEqual(0xFFFF, from_signed16(0xFFFF))
+        with self.assertRaises(OverflowError):
+            from_signed16(-32769)
+        with self.assertRaises(OverflowError):
+            from_signed16(0x10000)
+
+
+class TestArrays(unittest.TestCase):
+    def test_ints_to_bits(self):
+        values = np.arange(0, 0x10000, 13)
+        bits = ints_to_bits(values)
+        self.assertEqual((len(values), 16), bits.shape)
+        for (n, row) in zip(values[:50], bits[:50]):
+            self.assertEqual(to_bus16(int(n)), tuple(bool(x) for x in row))
+        np.testing.assert_array_equal(values, bits_to_ints(bits))
+
+    def test_other_widths(self):
+        values = np.array([0, 1, 5, 7])
+        bits = ints_to_bits(values, 3)
+        np.testing.assert_array_equal([[0, 0, 0], [0, 0, 1], [1, 0, 1], [1, 1, 1]], bits)
+        np.testing.assert_array_equal(values, bits_to_ints(bits))
+
+    def test_negative(self):
+        np.testing.assert_array_equal(ints_to_bits([0xFFFF]), ints_to_bits([-1]))
+
+    def test_signed(self):
+        np.testing.assert_array_equal([0, 1, -1, -32768, 32767], to_signed([0, 1, 0xFFFF, 0x8000, 0x7FFF]))
+        np.testing.assert_array_equal([0, 1, 0xFFFF, 0x8000], to_unsigned([0, 1, -1, -32768]))
+
+
+class TestLanes(unittest.TestCase):
+    def test_pack(self):
+        bits = np.zeros((2, 70), dtype=bool)
+        bits[0, 0] = bits[0, 65] = bits[1, 63] = True
+        words = pack_lanes(bits)
+        self.assertEqual((2, 2), words.shape)
+        self.assertEqual([1, 2], words[0].tolist())
+        self.assertEqual([1 << 63, 0], words[1].tolist())
+        np.testing.assert_array_equal(bits, unpack_lanes(words, 70))
+
+    def test_empty(self):
+        self.assertEqual((3, 0), pack_lanes(np.zeros((3, 0), dtype=bool)).shape)
+        self.assertEqual((3, 0), unpack_lanes(np.zeros((3, 0), dtype=np.uint64), 0).shape)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,298 @@
+"""
+debugger.py contains a debugger for programs running on the machine
+(see machine.py), with breakpoints on ROM addresses and watchpoints
+on writes to RAM, both optionally conditional.
+
+Neither is checked on every instruction executed:
+
+- a breakpoint replaces the decoded instruction at its address by a trap,
+  raising a Break before the instruction executes. The set of trapped
+  addresses is the bitset of breakpoints, stored in the program itself,
+  such that running to a breakpoint costs nothing over running freely;
+- watchpoints flag the RAM pages (of PAGE_SIZE words) they cover
+  in a bitmap. While any watchpoint is set, the RAM of the machine is
+  swapped for one checking that bitmap on writes, leaving reads
+  untouched. Only writes to a flagged page go through the watchpoints.
+
+Conditions are Python expressions (or functions of a dict of names),
+compiled once and only evaluated when the machine reaches a flagged site.
+Breakpoint conditions can use the registers A, D and PC, M (RAM[A])
+and RAM. Watchpoint conditions, evaluated in the middle of running,
+can use the address written, its old and new value, and RAM.
+The debugger only stops where the condition holds. Watched writes
+made while it is not running the machine (by a device, say) are only
+counted as hits, as there is nothing to stop.
+"""
+
+from typing import Callable, Dict, List, NamedTuple, Optional, Union
+
+from pfbc.hardware.machine import Machine, Break, decode
+
+
+PAGE_BITS = 8
+PAGE_SIZE = 1 << PAGE_BITS
+
+# instructions run between two checks for the end of the program
+CHUNK = 1 << 16
+
+BREAKPOINT = 'breakpoint'
+WATCHPOINT = 'watchpoint'
+STEP = 'step'
+LIMIT = 'limit'
+HALTED = 'halted'
+
+Condition = Union[str, Callable[[Dict[str, object]], bool]]
+
+
+def _trap(d: int, y: int) -> int:
+    raise Break()
+
+
+# a decoded instruction stopping the machine before it executes
+TRAP = (_trap, False, False, False, False, 0)
+
+
+class Stop(NamedTuple):
+    """
+    Why the debugger stopped the machine, and the PC it stopped at.
+    Watchpoints stop right after the instruction writing to RAM,
+    and hold the address written with its old and new value.
+    """
+    reason: str
+    pc: int
+    address: Optional[int] = None
+    old: Optional[int] = None
+    new: Optional[int] = None
+
+
+class _Site:
+    def __init__(self, condition: Optional[Condition]):
+        self.hits = 0
+        if isinstance(condition, str):
+            code = compile(condition, '<condition>', 'eval')
+            self.condition = lambda names: eval(code, {'__builtins__': {}}, names)
+        else:
+            self.condition = condition
+
+    def triggers(self, names: Dict[str, object]) -> bool:
+        if self.condition is not None and not self.condition(names):
+            return False
+        self.hits += 1
+        return True
+
+
+class Breakpoint(_Site):
+    def __init__(self, address: int, condition: Optional[Condition] = None):
+        super().__init__(condition)
+        self.address = address
+
+
+class Watchpoint(_Site):
+    """
+    Watches writes to RAM[start..end].
+    """
+
+    def __init__(self, start: int, end: int, condition: Optional[Condition] = None):
+        super().__init__(condition)
+        self.start = start
+        self.end = end
+
+
+class _WatchedList(list):
+    """
+    The RAM of the machine while watched, as a list.
+    """
+
+    def __setitem__(self, address, value):
+        pages = self.pages
+        if address.__class__ is int and address < self.limit and pages[address >> PAGE_BITS]:
+            old = list.__getitem__(self, address)
+            list.__setitem__(self, address, value)
+            self.debugger._written(address, old, value)
+        else:
+            list.__setitem__(self, address, value)
+
+
+class _WatchedMemory:
+    """
+    The RAM of the machine while watched, wrapping any other memory.
+    """
+
+    def __init__(self, ram):
+        self.ram = ram
+
+    def __len__(self) -> int:
+        return len(self.ram)
+
+    def __getitem__(self, address):
+        return self.ram[address]
+
+    def __setitem__(self, address, value):
+        if address.__class__ is int and address < self.limit and self.pages[address >> PAGE_BITS]:
+            old = self.ram[address]
+            self.ram[address] = value
+            self.debugger._written(address, old, value)
+        else:
+            self.ram[address] = value
+
+
+class Debugger:
+    """
+    Runs a machine under the control of breakpoints and watchpoints.
+    """
+
+    def __init__(self, machine: Machine):
+        self.machine = machine
+        self.breakpoints: Dict[int, Breakpoint] = {}
+        self.watchpoints: List[Watchpoint] = []
+        self.pages = bytearray()
+        self._ram = None
+        self._running = False
+        self._written_stop: Optional[Stop] = None
+
+    def names(self) -> Dict[str, object]:
+        """
+        The names available to conditions.
+        """
+        machine = self.machine
+        a = machine.a
+        return {
+            'A': a, 'D': machine.d, 'PC': machine.pc,
+            'M': machine.ram[a] if a < len(machine.ram) else None,
+            'RAM': machine.ram,
+        }
+
+    def break_at(self, address: int, condition: Optional[Condition] = None) -> Breakpoint:
+        """
+        Sets a breakpoint on the instruction at the given ROM address.
+        """
+        if not 0 <= address < len(self.machine.program):
+            raise ValueError(f"no instruction at address {address}")
+        breakpoint = self.breakpoints[address] = Breakpoint(address, condition)
+        self.machine.program[address] = TRAP
+        return breakpoint
+
+    def clear(self, address: int):
+        """
+        Removes the breakpoint at the given ROM address.
+        """
+        del self.breakpoints[address]
+        self.machine.program[address] = decode(self.machine.rom[address], self.machine.mul)
+
+    def watch(self, start: int, end: Optional[int] = None, condition: Optional[Condition] = None) -> Watchpoint:
+        """
+        Sets a watchpoint on writes to RAM[start..end], RAM[start] by default.
+        """
+        end = start if end is None else end
+        if not 0 <= start <= end < len(self.machine.ram):
+            raise ValueError(f"no RAM at addresses {start}..{end}")
+        watchpoint = Watchpoint(start, end, condition)
+        self.watchpoints.append(watchpoint)
+        self._flag_pages()
+        return watchpoint
+
+    def unwatch(self, watchpoint: Watchpoint):
+        self.watchpoints.remove(watchpoint)
+        self._flag_pages()
+
+    def _flag_pages(self):
+        machine = self.machine
+        pages = bytearray(max((w.end >> PAGE_BITS) + 1 for w in self.watchpoints) if self.watchpoints else 0)
+        for watchpoint in self.watchpoints:
+            for page in range(watchpoint.start >> PAGE_BITS, (watchpoint.end >> PAGE_BITS) + 1):
+                pages[page] = 1
+        self.pages = pages
+
+        if self.watchpoints and self._ram is None:
+            self._ram = machine.ram
+            machine.ram = _WatchedList(machine.ram) if isinstance(machine.ram, list) else _WatchedMemory(machine.ram)
+            machine.ram.debugger = self
+        elif not self.watchpoints and self._ram is not None:
+            if isinstance(machine.ram, list):
+                self._ram[:] = machine.ram
+            machine.ram, self._ram = self._ram, None
+        if self._ram is not None:
+            machine.ram.pages = pages
+            machine.ram.limit = len(pages) << PAGE_BITS
+
+    def _written(self, address: int, old: int, new: int):
+        names = {'address': address, 'old': old, 'new': new, 'RAM': self.machine.ram}
+        triggered = False
+        for watchpoint in self.watchpoints:
+            if watchpoint.start <= address <= watchpoint.end and watchpoint.triggers(names):
+                triggered = True
+        # writes made while the debugger is not running the machine
+        # (by its devices, say) only count as hits
+        if triggered and self._running:
+            self._written_stop = Stop(WATCHPOINT, -1, address, old, new)
+            raise Break(executed=True)
+
+    def _run(self, n: int) -> Optional[Stop]:
+        """
+        Runs at most n instructions, unless stopped by a Break.
+        """
+        self._written_stop = None
+        self._running = True
+        try:
+            self.machine.run(n)
+        except Break:
+            stop, self._written_stop = self._written_stop, None
+            if stop is not None:
+                return stop._replace(pc=self.machine.pc)
+            return Stop(BREAKPOINT, self.machine.pc)
+        finally:
+            self._running = False
+        return None
+
+    def _execute_trapped(self) -> Optional[Stop]:
+        """
+        Executes the instruction under the breakpoint at PC.
+        """
+        machine = self.machine
+        pc = machine.pc
+        machine.program[pc] = decode(machine.rom[pc], machine.mul)
+        try:
+            return self._run(1)
+        finally:
+            machine.program[pc] = TRAP
+
+    def step(self, n: int = 1) -> Stop:
+        """
+        Executes n instructions, ignoring breakpoints
+        but stopping at watchpoints.
+        """
+        machine = self.machine
+        for _ in range(n):
+            if machine.halted:
+                return Stop(HALTED, machine.pc)
+            stop = self._execute_trapped() if machine.pc in self.breakpoints else self._run(1)
+            if stop is not None:
+                return stop
+        return Stop(STEP, machine.pc)
+
+    def cont(self, limit: Optional[int] = None) -> Stop:
+        """
+        Runs until a breakpoint or watchpoint triggers, the machine halts
+        (or spins in its final loop), or after limit instructions. The instruction at PC
+        is executed first, even if it has a breakpoint.
+        """
+        machine = self.machine
+        start = machine.cycles
+        resuming = True
+        while True:
+            if machine.halted or machine.spinning:
+                return Stop(HALTED, machine.pc)
+            left = None if limit is None else limit - (machine.cycles - start)
+            if left is not None and left <= 0:
+                return Stop(LIMIT, machine.pc)
+
+            breakpoint = self.breakpoints.get(machine.pc)
+            if breakpoint is not None:
+                if not resuming and breakpoint.triggers(self.names()):
+                    return Stop(BREAKPOINT, machine.pc)
+                stop = self._execute_trapped()
+            else:
+                stop = self._run(CHUNK if left is None else min(left, CHUNK))
+            resuming = False
+            if stop is not None and stop.reason == WATCHPOINT:
+                return stop
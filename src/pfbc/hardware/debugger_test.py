@@ -0,0 +1,136 @@
+import unittest
+
+from pfbc.hardware.debugger import \
+    Debugger, Stop, BREAKPOINT, WATCHPOINT, STEP, LIMIT, HALTED
+from pfbc.hardware.machine import Machine, KBD, instruction
+from pfbc.hardware.machine_test import SUM
+
+
+def _machine(n: int = 10) -> Machine:
+    machine = Machine(SUM)
+    machine.ram[0] = n
+    return machine
+
+
+class TestDebugger(unittest.TestCase):
+    def test_continue(self):
+        machine = _machine()
+        debugger = Debugger(machine)
+        self.assertEqual(HALTED, debugger.cont().reason)
+        self.assertEqual(55, machine.ram[1])
+
+    def test_breakpoint(self):
+        machine = _machine()
+        debugger = Debugger(machine)
+        breakpoint = debugger.break_at(5)
+        for _ in range(10):
+            self.assertEqual(Stop(BREAKPOINT, 5), debugger.cont())
+        self.assertEqual(10, breakpoint.hits)
+        self.assertEqual(HALTED, debugger.cont().reason)
+        self.assertEqual(55, machine.ram[1])
+        debugger.clear(5)
+        self.assertEqual(SUM, machine.rom)
+
+    def test_mul(self):
+        machine = Machine([6, instruction('A', 'D'), 7, instruction('D*A', 'D')], mul=True)
+        debugger = Debugger(machine)
+        debugger.break_at(3)
+        self.assertEqual(Stop(BREAKPOINT, 3), debugger.cont())
+        self.assertEqual(Stop(STEP, 4), debugger.step())
+        self.assertEqual(42, machine.d)
+        debugger.clear(3)
+        machine.reset()
+        machine.run(4)
+        self.assertEqual(42, machine.d)
+
+    def test_condition(self):
+        machine = _machine()
+        debugger = Debugger(machine)
+        breakpoint = debugger.break_at(5, 'D == 3 and M == 10 + 9 + 8 + 7 + 6 + 5 + 4')
+        self.assertEqual(Stop(BREAKPOINT, 5), debugger.cont())
+        self.assertEqual(3, machine.d)
+        self.assertEqual(1, breakpoint.hits)
+        self.assertEqual(HALTED, debugger.cont().reason)
+        self.assertEqual(55, machine.ram[1])
+
+        machine = _machine()
+        debugger = Debugger(machine)
+        debugger.break_at(6, lambda names: names['D'] == 1)
+        self.assertEqual(Stop(BREAKPOINT, 6), debugger.cont())
+        self.assertEqual(55, machine.ram[1])
+
+    def test_step(self):
+        machine = _machine()
+        debugger = Debugger(machine)
+        debugger.break_at(1)
+        self.assertEqual(Stop(STEP, 1), debugger.step())
+        self.assertEqual(Stop(STEP, 3), debugger.step(2))
+        self.assertEqual(10, machine.d)
+        self.assertEqual(3, machine.cycles)
+        self.assertEqual(Stop(LIMIT, 8), debugger.cont(limit=5))
+        self.assertEqual(8, machine.cycles)
+
+        machine = Machine([1])
+        self.assertEqual(Stop(HALTED, 1), Debugger(machine).step(5))
+
+    def test_watchpoint(self):
+        machine = _machine()
+        ram = machine.ram
+        debugger = Debugger(machine)
+        watchpoint = debugger.watch(1)
+        self.assertIsNot(ram, machine.ram)
+        self.assertEqual(Stop(WATCHPOINT, 6, 1, 0, 10), debugger.cont())
+        self.assertEqual(Stop(WATCHPOINT, 6, 1, 10, 19), debugger.cont())
+        self.assertEqual(2, watchpoint.hits)
+        debugger.unwatch(watchpoint)
+        self.assertIs(ram, machine.ram)
+        self.assertEqual(19, ram[1])
+        self.assertEqual(HALTED, debugger.cont().reason)
+        self.assertEqual(55, ram[1])
+
+    def test_write_outside_run(self):
+        # the devices write to RAM between runs, as the keyboard does
+        machine = _machine()
+        debugger = Debugger(machine)
+        watchpoint = debugger.watch(KBD)
+        machine.keyboard = 65
+        self.assertEqual(65, machine.keyboard)
+        self.assertEqual(1, watchpoint.hits)
+        debugger.break_at(5)
+        self.assertEqual(Stop(BREAKPOINT, 5), debugger.cont())
+
+    def test_watch_condition(self):
+        machine = _machine()
+        debugger = Debugger(machine)
+        debugger.watch(0, 300, 'new > 50')
+        debugger.watch(1000)
+        self.assertEqual(Stop(WATCHPOINT, 6, 1, 49, 52), debugger.cont())
+        with self.assertRaises(ValueError):
+            debugger.watch(1 << 20)
+
+    def test_other_memory(self):
+        class Memory:
+            def __init__(self):
+                self.words = {}
+
+            def __len__(self):
+                return 1 << 16
+
+            def __getitem__(self, address):
+                return self.words.get(address, 0)
+
+            def __setitem__(self, address, value):
+                self.words[address] = value
+
+        memory = Memory()
+        memory[0] = 4
+        machine = Machine(SUM, memory)
+        debugger = Debugger(machine)
+        debugger.watch(1, condition='new == 9')
+        self.assertEqual(Stop(WATCHPOINT, 6, 1, 7, 9), debugger.cont())
+        self.assertEqual(HALTED, debugger.cont().reason)
+        self.assertEqual(10, memory[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+"""
+faults.py measures how well a set of test vectors
+would catch defects in a physical copy of a chip.
+
+The defects modelled are single stuck-at faults:
+the output of one NAND gate is permanently tied to False (stuck-at-0)
+or to True (stuck-at-1), no matter the inputs of that gate.
+A test vector detects a fault if the faulty chip produces
+a different output than the good chip for that vector.
+The fault coverage of a set of test vectors is the fraction
+of all possible stuck-at faults detected by at least one of them.
+
+Simulating one faulty chip at a time would require a full simulation
+per fault and per test vector. Instead up to 64 faulty chips are
+simulated at once: every wire carries a 64-bit word, where bit n of
+that word is the value of the wire in the n-th faulty chip. A single
+bitwise NAND on two words thus evaluates a gate in 64 chips at once,
+while the faults are injected by forcing the bit of the faulty chip
+to 0 or 1 on the output of the gate it affects.
+
+Once a fault is detected it is no longer simulated (fault dropping),
+such that every next test vector only pays for the faults
+that are still undetected.
+"""
+
+from typing import Callable, Iterable, List, NamedTuple, Optional, Sequence, Set
+
+from pfbc.hardware.netlist import Netlist, trace
+
+
+LANES = 64
+FULL = (1 << LANES) - 1
+
+
+class Fault(NamedTuple):
+    """
+    The output of the given gate stuck at the given value.
+    """
+    gate: int
+    stuck: bool
+
+
+class FaultReport:
+    """
+    The result of a fault simulation of a single chip
+    for a single set of test vectors.
+    """
+
+    def __init__(self, netlist: Netlist, faults: Sequence[Fault], detected: Set[Fault], vectors: int):
+        self.netlist = netlist
+        self.faults = faults
+        self.detected = detected
+        self.vectors = vectors
+
+    @property
+    def undetected(self) -> List[Fault]:
+        return [fault for fault in self.faults if fault not in self.detected]
+
+    @property
+    def coverage(self) -> float:
+        if not self.faults:
+            return 1.0
+        return len(self.detected) / len(self.faults)
+
+    def __str__(self) -> str:
+        return f"{self.netlist.name}: {len(self.detected)}/{len(self.faults)} faults detected " \
+            f"by {self.vectors} vectors ({self.coverage:.2%} coverage)"
+
+
+def all_faults(netlist: Netlist) -> List[Fault]:
+    """
+    Every stuck-at-0 and stuck-at-1 fault on the output of every gate.
+    """
+    return [Fault(gate, stuck) for gate in range(len(netlist.gates)) for stuck in (False, True)]
+
+
+def _detect(netlist: Netlist, bits: Sequence[bool], good: Sequence[bool], faults: Sequence[Fault]) -> int:
+    """
+    Simulates at most 64 faults for a single vector of input bits,
+    returning a word with bit n set if the n-th fault got detected.
+    """
+    n = len(netlist.gates)
+    clear, force = [FULL]*n, [0]*n
+    for (lane, fault) in enumerate(faults):
+        if fault.stuck:
+            force[fault.gate] |= 1 << lane
+        else:
+            clear[fault.gate] &= ~(1 << lane)
+
+    values = [0, FULL] + [FULL if bit else 0 for bit in bits] + [0]*n
+    first = netlist.first_gate
+    for (g, (a, b)) in enumerate(netlist.gates):
+        values[first+g] = ((~(values[a] & values[b])) & clear[g]) | force[g]
+
+    detected = 0
+    for (w, bit) in zip(netlist.outputs, good):
+        detected |= values[w] ^ (FULL if bit else 0)
+    return detected & ((1 << len(faults)) - 1)
+
+
+def simulate(netlist: Netlist, vectors: Iterable[Sequence], faults: Optional[Sequence[Fault]] = None) -> FaultReport:
+    """
+    Simulates the given faults (all stuck-at faults by default)
+    for every test vector, a test vector being the arguments
+    with which the chip is called.
+    """
+    faults = all_faults(netlist) if faults is None else list(faults)
+    remaining = list(faults)
+    detected = set()
+    count = 0
+    for vector in vectors:
+        count += 1
+        if not remaining:
+            continue
+        bits = netlist.flatten_inputs(*vector)
+        values = netlist.evaluate_bits(bits)
+        good = [values[w] for w in netlist.outputs]
+        undetected = []
+        for start in range(0, len(remaining), LANES):
+            group = remaining[start:start+LANES]
+            word = _detect(netlist, bits, good, group)
+            for (lane, fault) in enumerate(group):
+                if word >> lane & 1:
+                    detected.add(fault)
+                else:
+                    undetected.append(fault)
+        remaining = undetected
+    return FaultReport(netlist, faults, detected, count)
+
+
+def fault_coverage(chip: Callable, vectors: Iterable[Sequence]) -> FaultReport:
+    """
+    Traces the chip and simulates all of its stuck-at faults
+    for the given test vectors.
+    """
+    return simulate(trace(chip), vectors)
@@ -0,0 +1,64 @@
+from itertools import product
+import random
+import unittest
+
+from pfbc.hardware.chips import Not, And, Xor, Mux4Way16
+from pfbc.hardware.alu import adder_full
+from pfbc.hardware.netlist import trace, random_args
+from pfbc.hardware.faults import \
+    Fault, all_faults, simulate, fault_coverage
+
+
+def serial_detects(netlist, fault, args):
+    """
+    Reference implementation injecting a single fault.
+    """
+    bits = netlist.flatten_inputs(*args)
+    good = netlist.evaluate_bits(bits)
+    values = [False, True] + bits + [False]*len(netlist.gates)
+    for (g, (a, b)) in enumerate(netlist.gates):
+        out = not (values[a] and values[b])
+        values[netlist.first_gate+g] = fault.stuck if g == fault.gate else out
+    return any(values[w] != good[w] for w in netlist.outputs)
+
+
+class TestFaults(unittest.TestCase):
+    def test_all_faults(self):
+        netlist = trace(And)
+        self.assertEqual(
+            [Fault(0, False), Fault(0, True), Fault(1, False), Fault(1, True)],
+            all_faults(netlist))
+
+    def test_exhaustive_coverage(self):
+        for chip in [Not, And, Xor, adder_full]:
+            vectors = list(product([False, True], repeat=len(trace(chip).widths)))
+            report = fault_coverage(chip, vectors)
+            self.assertEqual(1.0, report.coverage, str(report))
+            self.assertEqual([], report.undetected)
+
+    def test_no_vectors(self):
+        report = fault_coverage(Xor, [])
+        self.assertEqual(0.0, report.coverage)
+        self.assertEqual(12, len(report.undetected))
+
+    def test_single_vector(self):
+        # Xor(False, False) is False, such that the output
+        # of the last gate can only be observed stuck at True
+        report = fault_coverage(Xor, [(False, False)])
+        self.assertIn(Fault(5, True), report.detected)
+        self.assertNotIn(Fault(5, False), report.detected)
+        self.assertLess(report.coverage, 1.0)
+
+    def test_matches_serial(self):
+        rng = random.Random(7)
+        netlist = trace(Mux4Way16)
+        vectors = random_args(netlist.widths, rng, 4)
+        report = simulate(netlist, vectors)
+        self.assertGreater(len(report.faults), 64)
+        for fault in report.faults:
+            expected = any(serial_detects(netlist, fault, args) for args in vectors)
+            self.assertEqual(expected, fault in report.detected, fault)
+
+
+if __name__ == '__main__':
+    unittest.main()
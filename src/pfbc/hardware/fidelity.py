@@ -0,0 +1,211 @@
+"""
+fidelity.py lets you choose, per chip and at runtime,
+how faithfully a chip is simulated.
+
+Every chip of chips.py, alu.py and mul.py is available in three
+interchangeable implementations:
+
+- GATE: the chip as defined in chips.py and alu.py,
+  built from other chips and ultimately from NAND gates;
+- NETLIST: the netlist of the chip (see netlist.py) compiled
+  into straight-line Python, still evaluating every NAND gate,
+  loaded from the cache of precompiled chips (see cache.py) if there;
+- NATIVE: the word-level Python implementation from native.py.
+
+A fourth mode, SHADOW, runs a fast implementation (NATIVE by default)
+and cross-checks a configurable fraction of the calls against the
+gate-level implementation. Production runs thus stay (mostly) fast,
+while any difference between the two gets noticed.
+
+The mode can be set for all chips at once, or per chip,
+where the mode set for a chip takes precedence:
+
+```
+from pfbc.hardware import fidelity
+
+fidelity.set_mode(fidelity.NATIVE)
+fidelity.set_mode(fidelity.GATE, 'alu')
+add16 = fidelity.chip('add16')  # runs native
+alu = fidelity.chip('alu')  # runs gate-level
+```
+
+The mode of a chip applies to calls made through the registry only:
+a composite chip running gate-level still calls the gate-level
+implementation of the chips it is built from, whatever their mode.
+The test script runner (see testscript.py) calls every chip
+through the registry.
+"""
+
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+
+from pfbc.hardware import chips, alu, mul, native, cache
+
+
+GATE = 'gate'
+NETLIST = 'netlist'
+NATIVE = 'native'
+SHADOW = 'shadow'
+
+MODES = (GATE, NETLIST, NATIVE, SHADOW)
+
+CHIPS = (
+    chips.Not, chips.And, chips.Or, chips.Xor, chips.Mux, chips.DMux,
+    chips.Not16, chips.And16, chips.Or16, chips.Mux16,
+    chips.Or8Way, chips.Mux4Way16, chips.Mux8Way16, chips.DMux4Way, chips.DMux8Way,
+    alu.adder_half, alu.adder_full, alu.add16, alu.inc16, alu.alu,
+    mul.mul16_shift_add, mul.mul16_wallace,
+)
+
+
+class ShadowMismatch(AssertionError):
+    """
+    Raised when the fast implementation of a chip
+    disagrees with its gate-level implementation.
+    """
+
+    def __init__(self, name: str, inputs: tuple, expected, actual):
+        super().__init__(f"{name}{inputs}: gate-level gives {expected}, fast implementation gives {actual}")
+        self.name = name
+        self.inputs = inputs
+        self.expected = expected
+        self.actual = actual
+
+
+class Chip:
+    """
+    A single chip, dispatching every call to the implementation
+    selected by the registry it belongs to.
+    """
+
+    def __init__(self, registry: 'Registry', name: str, gate: Callable, native: Callable):
+        self.registry = registry
+        self.name = name
+        self.implementations = {GATE: gate, NATIVE: native}
+        self.mode = None
+        self.calls = 0
+        self.checks = 0
+        self.mismatches = 0
+        self._credit = 0.0
+
+    def implementation(self, mode: str) -> Callable:
+        """
+        The implementation for the given mode, other than SHADOW.
+        The netlist is only compiled (or loaded from the cache) on first use.
+        """
+        impl = self.implementations.get(mode)
+        if impl is None:
+            if mode != NETLIST:
+                raise ValueError(f"no {mode} implementation for {self.name}")
+            impl = self.implementations[NETLIST] = cache.evaluator(self.implementations[GATE])
+        return impl
+
+    def __call__(self, *args):
+        self.calls += 1
+        mode = self.mode or self.registry.mode
+        if mode != SHADOW:
+            return self.implementation(mode)(*args)
+        out = self.implementation(self.registry.shadow_fast)(*args)
+        self._credit += self.registry.shadow_rate
+        if self._credit >= 1.0:
+            self._credit -= 1.0
+            self.checks += 1
+            expected = self.implementation(GATE)(*args)
+            if expected != out:
+                self.mismatches += 1
+                self.registry.on_mismatch(ShadowMismatch(self.name, args, expected, out))
+        return out
+
+    def __repr__(self) -> str:
+        return f"<Chip {self.name} ({self.mode or self.registry.mode})>"
+
+
+def _raise(error: ShadowMismatch):
+    raise error
+
+
+class Registry:
+    """
+    Maps chip names onto their implementations.
+
+    In SHADOW mode, shadow_rate is the fraction of calls
+    that is checked against the gate-level implementation,
+    and on_mismatch is called with a ShadowMismatch for every
+    check that fails, which by default raises it.
+    """
+
+    def __init__(self, mode: str = GATE):
+        self.chips = {}
+        self.mode = mode
+        self.shadow_fast = NATIVE
+        self.shadow_rate = 0.01
+        self.on_mismatch = _raise
+        for gate in CHIPS:
+            self.register(gate.__name__, gate, getattr(native, gate.__name__))
+
+    def register(self, name: str, gate: Callable, native: Callable) -> Chip:
+        self.chips[name] = Chip(self, name, gate, native)
+        return self.chips[name]
+
+    def chip(self, name: str) -> Chip:
+        return self.chips[name]
+
+    def set_mode(self, mode: str, *names: str):
+        """
+        Sets the mode of the given chips, or of all chips if none are given.
+        Setting the mode of a chip to None makes it follow the global mode.
+        """
+        if mode is not None and mode not in MODES:
+            raise ValueError(f"unknown mode {mode}")
+        if not names:
+            if mode is None:
+                raise ValueError("the global mode can't be None")
+            self.mode = mode
+        for name in names:
+            self.chips[name].mode = mode
+
+    def shadow(self, rate: float, fast: str = NATIVE, on_mismatch: Optional[Callable] = None):
+        """
+        Configures the SHADOW mode.
+        """
+        if not 0.0 <= rate <= 1.0:
+            raise ValueError(f"shadow rate {rate} not within [0, 1]")
+        if fast not in (NETLIST, NATIVE):
+            raise ValueError(f"{fast} is not a fast mode")
+        self.shadow_rate = rate
+        self.shadow_fast = fast
+        if on_mismatch is not None:
+            self.on_mismatch = on_mismatch
+
+    @contextmanager
+    def using(self, mode: str, *names: str) -> Iterator['Registry']:
+        """
+        Temporarily sets the mode of the given chips,
+        or the global mode if no chips are given.
+        """
+        previous = {name: self.chips[name].mode for name in names}
+        global_mode = self.mode
+        self.set_mode(mode, *names)
+        try:
+            yield self
+        finally:
+            self.mode = global_mode
+            for (name, m) in previous.items():
+                self.chips[name].mode = m
+
+    def stats(self) -> Dict[str, tuple]:
+        """
+        Calls, shadow checks and mismatches per chip
+        for every chip that got called.
+        """
+        return {
+            name: (c.calls, c.checks, c.mismatches)
+            for (name, c) in self.chips.items() if c.calls}
+
+
+registry = Registry()
+
+chip = registry.chip
+set_mode = registry.set_mode
+shadow = registry.shadow
+using = registry.using
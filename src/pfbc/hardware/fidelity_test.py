@@ -0,0 +1,73 @@
+import unittest
+
+from pfbc.hardware import chips, native
+from pfbc.hardware.fidelity import \
+    Registry, ShadowMismatch, CHIPS, \
+    GATE, NETLIST, NATIVE, SHADOW
+
+
+ONE = (False,)*15 + (True,)
+TWO = (False,)*14 + (True, False)
+THREE = (False,)*14 + (True, True)
+
+
+class TestRegistry(unittest.TestCase):
+    def test_all_chips(self):
+        registry = Registry()
+        self.assertEqual({c.__name__ for c in CHIPS}, set(registry.chips))
+
+    def test_modes(self):
+        registry = Registry()
+        add16 = registry.chip('add16')
+        for mode in [GATE, NETLIST, NATIVE]:
+            registry.set_mode(mode)
+            self.assertEqual(THREE, add16(ONE, TWO), mode)
+        self.assertIs(native.add16, add16.implementation(NATIVE))
+
+    def test_per_chip(self):
+        registry = Registry(NATIVE)
+        registry.set_mode(GATE, 'Not')
+        self.assertEqual(GATE, registry.chip('Not').mode)
+        self.assertIsNone(registry.chip('And').mode)
+        with registry.using(NETLIST, 'Not', 'And'):
+            self.assertEqual(NETLIST, registry.chip('And').mode)
+        self.assertEqual(GATE, registry.chip('Not').mode)
+        self.assertIsNone(registry.chip('And').mode)
+        with registry.using(GATE):
+            self.assertEqual(GATE, registry.mode)
+        self.assertEqual(NATIVE, registry.mode)
+
+    def test_bad_mode(self):
+        registry = Registry()
+        with self.assertRaises(ValueError):
+            registry.set_mode('fast')
+        with self.assertRaises(ValueError):
+            registry.shadow(2.0)
+
+    def test_shadow_sampling(self):
+        registry = Registry(SHADOW)
+        registry.shadow(0.25)
+        xor = registry.chip('Xor')
+        for _ in range(100):
+            self.assertTrue(xor(True, False))
+        self.assertEqual({'Xor': (100, 25, 0)}, registry.stats())
+
+    def test_shadow_mismatch(self):
+        registry = Registry(SHADOW)
+        registry.register('Not', chips.Not, lambda i: bool(i))
+        registry.shadow(1.0)
+        with self.assertRaises(ShadowMismatch) as ctx:
+            registry.chip('Not')(True)
+        self.assertEqual(('Not', (True,), False, True), (
+            ctx.exception.name, ctx.exception.inputs, ctx.exception.expected, ctx.exception.actual))
+
+        seen = []
+        registry.shadow(0.5, on_mismatch=seen.append)
+        for _ in range(4):
+            registry.chip('Not')(False)
+        self.assertEqual(2, len(seen))
+        self.assertEqual((5, 3, 3), registry.stats()['Not'])
+
+
+if __name__ == '__main__':
+    unittest.main()
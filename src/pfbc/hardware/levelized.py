@@ -0,0 +1,91 @@
+"""
+levelized.py simulates the netlist of a chip (see netlist.py)
+one level of gates at a time, rather than one gate at a time.
+
+The level of a gate is one more than the highest level of the wires
+it reads, where the constants and the inputs of the chip are at level 0.
+All gates of a level thus only read wires of lower levels,
+and can be evaluated together. For every level the indices of the
+wires read and driven by its gates are stored as NumPy index arrays,
+such that a single fancy-indexed ~(a & b) over a matrix holding
+every wire for many input vectors evaluates an entire level.
+
+A wide chip thus takes as many array operations as the longest
+path through it is deep, rather than one per gate: Mux8Way16 takes
+13 levels for its 932 gates, and the ALU 100 levels for its 1187 gates,
+most of these levels being the carry rippling through add16.
+
+The wire matrix can be boolean, with one column per input vector,
+or hold unsigned 64-bit words, with 64 input vectors per column
+packed as done by codec.pack_lanes.
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+from pfbc.hardware.codec import pack_lanes, unpack_lanes
+from pfbc.hardware.netlist import Netlist
+
+
+def levelize(netlist: Netlist) -> List[np.ndarray]:
+    """
+    The indices of the gates per level, starting from level 1.
+    """
+    gates = np.array(netlist.levels()[netlist.first_gate:], dtype=np.intp)
+    if not len(gates):
+        return []
+    order = np.argsort(gates, kind='stable')
+    bounds = np.searchsorted(gates[order], np.arange(1, gates.max() + 2))
+    return [order[lo:hi] for (lo, hi) in zip(bounds[:-1], bounds[1:])]
+
+
+class LevelizedSimulator:
+    """
+    Evaluates a netlist level by level over a matrix of wires.
+    """
+
+    def __init__(self, netlist: Netlist):
+        self.netlist = netlist
+        gates = np.array(netlist.gates, dtype=np.intp).reshape(-1, 2)
+        self.levels: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = [
+            (g + netlist.first_gate, gates[g, 0], gates[g, 1])
+            for g in levelize(netlist)]
+        self.outputs = np.array(netlist.outputs, dtype=np.intp)
+
+    @property
+    def depth(self) -> int:
+        """
+        Number of gates on the longest path through the chip.
+        """
+        return len(self.levels)
+
+    def evaluate_wires(self, inputs: np.ndarray) -> np.ndarray:
+        """
+        Evaluates a matrix of shape (n_inputs, columns), boolean or
+        of 64-bit words, returning the matrix of every wire of shape
+        (n_wires, columns) with the same type.
+        """
+        inputs = np.asarray(inputs)
+        if inputs.ndim != 2 or inputs.shape[0] != self.netlist.n_inputs:
+            raise ValueError(f"expected {self.netlist.n_inputs} rows of inputs, got shape {inputs.shape}")
+        values = np.empty((self.netlist.n_wires, inputs.shape[1]), dtype=inputs.dtype)
+        values[0] = 0
+        values[1] = ~values[0]
+        values[2:self.netlist.first_gate] = inputs
+        for (out, a, b) in self.levels:
+            values[out] = ~(values[a] & values[b])
+        return values
+
+    def evaluate(self, bits: np.ndarray, packed: bool = True) -> np.ndarray:
+        """
+        Evaluates a boolean matrix with one row of input bits per vector,
+        returning a boolean matrix with one row of output bits per vector.
+        Unless packed is unset, the vectors are evaluated 64 at a time
+        as the bits of 64-bit words.
+        """
+        bits = np.asarray(bits, dtype=bool).reshape(-1, self.netlist.n_inputs)
+        if not packed:
+            return self.evaluate_wires(bits.T)[self.outputs].T
+        values = self.evaluate_wires(pack_lanes(bits.T))
+        return unpack_lanes(values[self.outputs], len(bits)).T
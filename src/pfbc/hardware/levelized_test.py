@@ -0,0 +1,57 @@
+import unittest
+
+import numpy as np
+
+from pfbc.hardware.chips import Not, And, Xor, Mux8Way16
+from pfbc.hardware.alu import add16, alu
+from pfbc.hardware.netlist import trace
+from pfbc.hardware.levelized import levelize, LevelizedSimulator
+
+
+class TestLevelize(unittest.TestCase):
+    def test_levels(self):
+        self.assertEqual([[0]], [level.tolist() for level in levelize(trace(Not))])
+        self.assertEqual([[0], [1]], [level.tolist() for level in levelize(trace(And))])
+        # Xor: nand(a, b), not a, not b | or | and: nand, not
+        self.assertEqual([[0, 1, 2], [3], [4], [5]], [level.tolist() for level in levelize(trace(Xor))])
+
+    def test_levels_cover_all_gates(self):
+        netlist = trace(alu)
+        levels = levelize(netlist)
+        self.assertEqual(list(range(len(netlist.gates))), sorted(np.concatenate(levels).tolist()))
+        level = {}
+        for (n, gates) in enumerate(levels, 1):
+            for g in gates:
+                level[netlist.first_gate + int(g)] = n
+        for (i, (a, b)) in enumerate(netlist.gates, netlist.first_gate):
+            self.assertGreater(level[i], max(level.get(a, 0), level.get(b, 0)))
+
+    def test_depth(self):
+        self.assertEqual(1, LevelizedSimulator(trace(Not)).depth)
+        self.assertLess(LevelizedSimulator(trace(Mux8Way16)).depth, 40)
+
+
+class TestSimulator(unittest.TestCase):
+    def test_matches_netlist(self):
+        rng = np.random.default_rng(2)
+        for chip in [Xor, Mux8Way16, add16, alu]:
+            simulator = LevelizedSimulator(trace(chip))
+            bits = rng.random((100, simulator.netlist.n_inputs)) < 0.5
+            expected = [simulator.netlist.evaluate_outputs(row) for row in bits]
+            np.testing.assert_array_equal(expected, simulator.evaluate(bits), chip.__name__)
+            np.testing.assert_array_equal(expected, simulator.evaluate(bits, packed=False), chip.__name__)
+
+    def test_wires(self):
+        netlist = trace(And)
+        values = LevelizedSimulator(netlist).evaluate_wires(np.array([[0, 0, 1, 1], [0, 1, 0, 1]], dtype=bool))
+        self.assertEqual((netlist.n_wires, 4), values.shape)
+        np.testing.assert_array_equal([[0, 0, 0, 0], [1, 1, 1, 1]], values[:2])
+        np.testing.assert_array_equal([0, 0, 0, 1], values[netlist.outputs[0]])
+
+    def test_bad_shape(self):
+        with self.assertRaises(ValueError):
+            LevelizedSimulator(trace(And)).evaluate_wires(np.zeros((3, 1), dtype=bool))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,269 @@
+"""
+machine.py emulates the HACK computer at word level:
+the CPU executing instructions from ROM, and the RAM
+including the memory maps of the screen and keyboard.
+
+The CPU is not simulated through its gates. Every instruction is
+decoded once, when the ROM is loaded, into a form that can be executed
+with as little Python as possible, with the computation of the ALU
+done on integers. This is the fast path for running actual programs,
+where the chips remain the reference for what the hardware does.
+
+Memory layout:
+
+- RAM[0..16383]: data memory;
+- RAM[16384..24575]: screen, 512x256 pixels, 32 words per row,
+  the least significant bit of a word being the leftmost pixel;
+- RAM[24576]: keyboard, the code of the key currently pressed, 0 if none.
+
+The RAM of the machine can be any object that reads and writes words
+by address (or slices of them by range of addresses) as a list does,
+a list of 24577 words by default.
+
+Instructions:
+
+- A-instruction 0vvv vvvv vvvv vvvv: A = v
+- C-instruction 111a cccc ccdd djjj: dest = comp; jump if jump
+  where comp is computed by the ALU from D and A (a=0) or M (a=1),
+  the six c bits being the zx, nx, zy, ny, f, no bits of the ALU,
+  dest stores the result in A, D and/or M (bits A, D, M),
+  and jump jumps to the address in A if the result is
+  < 0 (j1), = 0 (j2) and/or > 0 (j3).
+
+A machine with the multiplier (see mul.py) extends this with:
+
+- C-instruction 110a 0000 00dd djjj: dest = D*A (a=0) or D*M (a=1),
+  the 16 least significant bits of the product; jump if jump
+
+The extension uses the second bit of a C-instruction, which is always
+set by the assembler and ignored by the CPU without the multiplier.
+"""
+
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+
+
+SCREEN = 16384
+SCREEN_SIZE = 8192
+KBD = 24576
+MEMORY_SIZE = KBD + 1
+
+COMP: Dict[str, int] = {
+    '0': 0b0101010, '1': 0b0111111, '-1': 0b0111010,
+    'D': 0b0001100, 'A': 0b0110000, '!D': 0b0001101, '!A': 0b0110001,
+    '-D': 0b0001111, '-A': 0b0110011, 'D+1': 0b0011111, 'A+1': 0b0110111,
+    'D-1': 0b0001110, 'A-1': 0b0110010, 'D+A': 0b0000010, 'D-A': 0b0010011,
+    'A-D': 0b0000111, 'D&A': 0b0000000, 'D|A': 0b0010101,
+    'M': 0b1110000, '!M': 0b1110001, '-M': 0b1110011, 'M+1': 0b1110111,
+    'M-1': 0b1110010, 'D+M': 0b1000010, 'D-M': 0b1010011, 'M-D': 0b1000111,
+    'D&M': 0b1000000, 'D|M': 0b1010101,
+}
+# the computations of the multiplier, see decode
+MUL_COMP: Dict[str, int] = {'D*A': 0b0000000, 'D*M': 0b1000000}
+JUMP: Dict[str, int] = {
+    '': 0, 'JGT': 1, 'JEQ': 2, 'JGE': 3, 'JLT': 4, 'JNE': 5, 'JLE': 6, 'JMP': 7,
+}
+
+Op = Callable[[int, int], int]
+Decoded = Union[int, Tuple[Op, bool, bool, bool, bool, int]]
+
+# the computations defined by the HACK assembly language,
+# keyed by their c bits, with d the D register and y either A or M
+_OPS: Dict[int, Op] = {
+    0b101010: lambda d, y: 0,
+    0b111111: lambda d, y: 1,
+    0b111010: lambda d, y: 0xFFFF,
+    0b001100: lambda d, y: d,
+    0b110000: lambda d, y: y,
+    0b001101: lambda d, y: d ^ 0xFFFF,
+    0b110001: lambda d, y: y ^ 0xFFFF,
+    0b001111: lambda d, y: -d & 0xFFFF,
+    0b110011: lambda d, y: -y & 0xFFFF,
+    0b011111: lambda d, y: (d + 1) & 0xFFFF,
+    0b110111: lambda d, y: (y + 1) & 0xFFFF,
+    0b001110: lambda d, y: (d - 1) & 0xFFFF,
+    0b110010: lambda d, y: (y - 1) & 0xFFFF,
+    0b000010: lambda d, y: (d + y) & 0xFFFF,
+    0b010011: lambda d, y: (d - y) & 0xFFFF,
+    0b000111: lambda d, y: (y - d) & 0xFFFF,
+    0b000000: lambda d, y: d & y,
+    0b010101: lambda d, y: d | y,
+}
+
+
+def alu_op(c: int) -> Op:
+    """
+    The computation of the ALU for the given six c bits,
+    for any combination of them.
+    """
+    op = _OPS.get(c)
+    if op is not None:
+        return op
+    zx, nx, zy, ny, f, no = (bool(c >> i & 1) for i in range(5, -1, -1))
+
+    def generic(x: int, y: int) -> int:
+        if zx:
+            x = 0
+        if nx:
+            x ^= 0xFFFF
+        if zy:
+            y = 0
+        if ny:
+            y ^= 0xFFFF
+        out = (x + y) & 0xFFFF if f else x & y
+        return out ^ 0xFFFF if no else out
+    return generic
+
+
+def instruction(comp: str, dest: str = '', jump: str = '') -> int:
+    """
+    Encodes a C-instruction, e.g. instruction('D+M', 'AM', 'JGT').
+    """
+    d = ('A' in dest) << 2 | ('D' in dest) << 1 | ('M' in dest)
+    if comp in MUL_COMP:
+        return 0b110 << 13 | MUL_COMP[comp] << 6 | d << 3 | JUMP[jump]
+    return 0b111 << 13 | COMP[comp] << 6 | d << 3 | JUMP[jump]
+
+
+class Break(Exception):
+    """
+    Raised while running to stop the machine, either by the computation
+    of an instruction, before executing it, or by the memory,
+    once the instruction writing to it is executed.
+    """
+
+    def __init__(self, executed: bool = False):
+        super().__init__()
+        self.executed = executed
+
+
+def _mul(d: int, y: int) -> int:
+    return (d * y) & 0xFFFF
+
+
+def decode(word: int, mul: bool = False) -> Decoded:
+    """
+    Decodes an instruction into either the value loaded by an
+    A-instruction, or a tuple holding the computation, whether it reads M,
+    whether it writes A, D and M, and the jump bits of a C-instruction.
+    Multiplications are only decoded as such if mul is set.
+    """
+    if not word & 0x8000:
+        return word
+    return (
+        _mul if mul and not word & 0x2000 else alu_op(word >> 6 & 0b111111),
+        bool(word & 0x1000),
+        bool(word & 0b100000), bool(word & 0b10000), bool(word & 0b1000),
+        word & 0b111,
+    )
+
+
+_JMP = instruction('0', jump='JMP')
+
+
+class Machine:
+    """
+    The HACK computer, running a program loaded in its ROM,
+    optionally with the multiplier.
+    """
+
+    def __init__(self, rom: Sequence[int], ram=None, mul: bool = False):
+        self.rom = list(rom)
+        self.mul = mul
+        self.program: List[Decoded] = [decode(word, mul) for word in self.rom]
+        self.ram = [0]*MEMORY_SIZE if ram is None else ram
+        self.a = 0
+        self.d = 0
+        self.pc = 0
+        self.cycles = 0
+
+    def reset(self):
+        self.a = self.d = self.pc = 0
+
+    @property
+    def halted(self) -> bool:
+        """
+        Whether the program counter ran past the end of the program.
+        """
+        return not 0 <= self.pc < len(self.program)
+
+    @property
+    def spinning(self) -> bool:
+        """
+        Whether the machine is stuck in the loop every HACK program
+        ends with, jumping to itself for ever (at either instruction):
+
+            (END)
+            @END
+            0;JMP
+        """
+        pc, program = self.pc, self.program
+        if not 0 <= pc < len(program):
+            return False
+        if program[pc].__class__ is not int:
+            pc -= 1
+        return 0 <= pc < len(program) - 1 and program[pc] == pc and self.rom[pc+1] == _JMP
+
+    def step(self) -> bool:
+        """
+        Executes a single instruction, returning False if halted.
+        """
+        return self.run(1) == 1
+
+    def run(self, n: int) -> int:
+        """
+        Executes (at most) n instructions, returning
+        the number of instructions executed.
+        A Break raised while running leaves the registers
+        as they are at that point, and is passed on.
+        """
+        program, ram = self.program, self.ram
+        a, d, pc = self.a, self.d, self.pc
+        size = len(program)
+        done = 0
+        try:
+            for done in range(1, n+1):
+                if pc >= size:
+                    done -= 1
+                    break
+                ins = program[pc]
+                if ins.__class__ is int:
+                    a = ins
+                    pc += 1
+                    continue
+                op, use_m, dest_a, dest_d, dest_m, jump = ins
+                address = a
+                out = op(d, ram[address] if use_m else address)
+                if dest_d:
+                    d = out
+                if dest_a:
+                    a = out
+                if jump and jump & (4 if out & 0x8000 else 2 if out == 0 else 1):
+                    pc = address
+                else:
+                    pc += 1
+                # last, such that a Break raised by the memory
+                # leaves the instruction executed
+                if dest_m:
+                    ram[address] = out
+        except Break as stop:
+            if not stop.executed:
+                done -= 1
+            raise
+        finally:
+            self.a, self.d, self.pc = a, d, pc
+            self.cycles += done
+        return done
+
+    @property
+    def keyboard(self) -> int:
+        return self.ram[KBD]
+
+    @keyboard.setter
+    def keyboard(self, code: int):
+        self.ram[KBD] = code & 0xFFFF
+
+    def screen(self) -> List[int]:
+        """
+        A snapshot of the memory map of the screen.
+        """
+        return list(self.ram[SCREEN:SCREEN + SCREEN_SIZE])
@@ -0,0 +1,110 @@
+import random
+import unittest
+
+from pfbc.hardware import native
+from pfbc.hardware.codec import to_bus16, from_bus16
+from pfbc.hardware.machine import \
+    Machine, COMP, KBD, SCREEN, SCREEN_SIZE, \
+    alu_op, decode, instruction
+
+
+# RAM[1] = RAM[0] + (RAM[0]-1) + ... + 1
+SUM = [
+    0, instruction('M', 'D'),
+    9, instruction('D', jump='JEQ'),
+    1, instruction('D+M', 'M'),
+    instruction('D-1', 'D'),
+    2, instruction('0', jump='JMP'),
+    9, instruction('0', jump='JMP'),
+]
+
+
+class TestMachine(unittest.TestCase):
+    def test_alu_op(self):
+        rng = random.Random(35)
+        values = [0, 1, 2, 0x7FFF, 0x8000, 0xFFFF] + [rng.randrange(0x10000) for _ in range(10)]
+        for c in range(64):
+            op = alu_op(c)
+            flags = [bool(c >> i & 1) for i in range(5, -1, -1)]
+            for x in values:
+                for y in values:
+                    out, _, _ = native.alu(to_bus16(x), to_bus16(y), *flags)
+                    self.assertEqual(from_bus16(out), op(x, y), (c, x, y))
+
+    def test_instruction(self):
+        self.assertEqual(0b1111000010010001, instruction('D+M', 'D', 'JGT'))
+        self.assertEqual(0b1110101010000111, instruction('0', jump='JMP'))
+        self.assertEqual(0b1110110111101000, instruction('A+1', 'AM'))
+        self.assertEqual(28, len(COMP))
+        self.assertEqual(1234, decode(1234))
+
+    def test_run(self):
+        machine = Machine(SUM)
+        machine.ram[0] = 100
+        self.assertEqual(10, machine.run(10))
+        while not machine.spinning:
+            machine.step()
+        self.assertEqual(5050, machine.ram[1])
+        self.assertEqual(9, machine.pc)
+        self.assertEqual(0, machine.d)
+        self.assertFalse(machine.halted)
+        machine.step()
+        self.assertEqual(10, machine.pc)
+        self.assertTrue(machine.spinning)
+
+    def test_halt(self):
+        machine = Machine([5, instruction('A', 'D')])
+        self.assertEqual(2, machine.run(100))
+        self.assertEqual(5, machine.d)
+        self.assertTrue(machine.halted)
+        self.assertFalse(machine.step())
+        self.assertEqual(2, machine.cycles)
+        machine.reset()
+        self.assertEqual(0, machine.pc)
+
+    def test_registers(self):
+        # M is written at the address held by A before the instruction,
+        # and the jump goes there as well
+        machine = Machine([10, instruction('A+1', 'AM', 'JMP')])
+        machine.run(2)
+        self.assertEqual(11, machine.ram[10])
+        self.assertEqual(11, machine.a)
+        self.assertEqual(10, machine.pc)
+        machine = Machine([0x7FFF, instruction('A+1', 'D', 'JLT'), instruction('D', jump='JGE')])
+        machine.run(2)
+        self.assertEqual(0x8000, machine.d)
+        self.assertEqual(0x7FFF, machine.pc)
+
+    def test_mul(self):
+        self.assertEqual(0b1100000000010000, instruction('D*A', 'D'))
+        self.assertEqual(0b1101000000001000, instruction('D*M', 'M'))
+        rng = random.Random(34)
+        # RAM[2] = RAM[0] * RAM[1], RAM[3] = RAM[2] * 1000
+        rom = [
+            0, instruction('M', 'D'), 1, instruction('D*M', 'D'), 2, instruction('D', 'M'),
+            1000, instruction('D*A', 'D'), 3, instruction('D', 'M'),
+        ]
+        for _ in range(100):
+            x, y = rng.randrange(0x10000), rng.randrange(0x10000)
+            machine = Machine(rom, mul=True)
+            machine.ram[0:2] = [x, y]
+            machine.run(len(rom))
+            product = from_bus16(native.mul16(to_bus16(x), to_bus16(y)))
+            self.assertEqual(product, machine.ram[2])
+            self.assertEqual(from_bus16(native.mul16(to_bus16(product), to_bus16(1000))), machine.ram[3])
+        # without the multiplier, the same instruction computes D&A
+        machine = Machine([0b1100, instruction('A', 'D'), 0b1010, instruction('D*A', 'D')])
+        machine.run(4)
+        self.assertEqual(0b1000, machine.d)
+
+    def test_devices(self):
+        machine = Machine([KBD, instruction('M', 'D'), SCREEN + 1, instruction('D', 'M')])
+        machine.keyboard = 0x41
+        machine.run(4)
+        screen = machine.screen()
+        self.assertEqual(SCREEN_SIZE, len(screen))
+        self.assertEqual([0, 0x41, 0], screen[:3])
+
+
+if __name__ == '__main__':
+    unittest.main()
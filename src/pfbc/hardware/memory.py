@@ -0,0 +1,147 @@
+"""
+memory.py contains a sparse RAM, for address spaces too wide
+to be held in full (as a machine with 32-bit addresses would have).
+
+The address space is split into pages of a fixed number of words,
+a page being allocated on the first write to it. Reading a page never
+written reads 0 without allocating it, such that the memory used
+tracks the pages a program actually writes, not the width of its
+addresses. The last page accessed is cached, programs mostly reading
+and writing close to where they did before.
+
+Pages are arrays of unsigned words. A range of pages can be mapped
+on an mmap instead, anonymous or backed by a file: the operating
+system then only provides the parts of a huge data segment that are
+touched, and a file keeps its content once the memory is gone.
+
+PagedMemory reads and writes words by address (or slices of them
+by range of addresses) as the list of words used as RAM by the
+machine (see machine.py) does, such that either can be used.
+"""
+
+import mmap
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from pfbc.hardware.machine import MEMORY_SIZE
+
+
+_TYPECODES = {16: 'H', 32: 'I', 64: 'Q'}
+
+
+class PagedMemory:
+    """
+    RAM of the given number of words, of the given width in bits,
+    allocated per page of 2**page_bits words.
+    """
+
+    def __init__(self, size: int = MEMORY_SIZE, width: int = 16, page_bits: int = 10):
+        if width not in _TYPECODES:
+            raise ValueError(f"words of {width} bits are not supported, only {sorted(_TYPECODES)}")
+        self.size = size
+        self.width = width
+        self.page_bits = page_bits
+        self.page_size = 1 << page_bits
+        self.typecode = _TYPECODES[width]
+        self.pages: Dict[int, Union[array, memoryview]] = {}
+        self._mmaps: List[Tuple[mmap.mmap, memoryview]] = []
+        self._zero = array(self.typecode, bytes(self.page_size * array(self.typecode).itemsize))
+        # the last page accessed, the page of zeros
+        # standing in for a page not allocated
+        self._number = -1
+        self._page: Union[array, memoryview] = self._zero
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _load(self, number: int, allocate: bool) -> Union[array, memoryview]:
+        page = self.pages.get(number)
+        if page is None:
+            if not allocate:
+                # not cached, the next write must allocate
+                return self._zero
+            page = self.pages[number] = array(self.typecode, self._zero)
+        self._number, self._page = number, page
+        return page
+
+    def __getitem__(self, address):
+        if address.__class__ is not int:
+            return [self[a] for a in range(*address.indices(self.size))]
+        if not 0 <= address < self.size:
+            raise IndexError(f"address {address} out of range")
+        number = address >> self.page_bits
+        page = self._page if number == self._number else self._load(number, False)
+        return page[address & (self.page_size - 1)]
+
+    def __setitem__(self, address, value):
+        if address.__class__ is not int:
+            addresses = range(*address.indices(self.size))
+            values = list(value)
+            if len(values) != len(addresses):
+                raise ValueError(f"cannot write {len(values)} words to {len(addresses)} addresses")
+            for (a, v) in zip(addresses, values):
+                self[a] = v
+            return
+        if not 0 <= address < self.size:
+            raise IndexError(f"address {address} out of range")
+        number = address >> self.page_bits
+        page = self._page if number == self._number else self._load(number, True)
+        page[address & (self.page_size - 1)] = value
+
+    def __iter__(self) -> Iterator[int]:
+        for address in range(self.size):
+            yield self[address]
+
+    def map(self, start: int, size: int, path: Optional[str] = None):
+        """
+        Maps the pages holding RAM[start..start+size-1] on an mmap,
+        anonymous or backed by the file at the given path (which is
+        created, or extended, as needed). Any content of these pages
+        is replaced by the content of the mmap.
+        """
+        first = start >> self.page_bits
+        last = (start + size - 1) >> self.page_bits
+        if size <= 0 or start < 0 or start + size > self.size:
+            raise ValueError(f"cannot map {size} words from address {start}")
+        n_bytes = (last - first + 1) * len(self._zero) * self._zero.itemsize
+        if path is None:
+            memory = mmap.mmap(-1, n_bytes)
+        else:
+            with open(path, 'a+b') as f:
+                if f.seek(0, 2) < n_bytes:
+                    f.truncate(n_bytes)
+                memory = mmap.mmap(f.fileno(), n_bytes)
+        words = memoryview(memory).cast(self.typecode)
+        self._mmaps.append((memory, words))
+        for number in range(first, last + 1):
+            offset = (number - first) * self.page_size
+            self.pages[number] = words[offset:offset + self.page_size]
+        self._number, self._page = -1, self._zero
+
+    def flush(self):
+        """
+        Writes the pages mapped on files back to them.
+        """
+        for (memory, _) in self._mmaps:
+            memory.flush()
+
+    def close(self):
+        """
+        Unmaps all mmaps, whose pages are no longer available.
+        """
+        self.flush()
+        self._number, self._page = -1, self._zero
+        mapped = [n for (n, page) in self.pages.items() if isinstance(page, memoryview)]
+        for number in mapped:
+            self.pages.pop(number).release()
+        for (memory, words) in self._mmaps:
+            words.release()
+            memory.close()
+        self._mmaps = []
+
+    @property
+    def footprint(self) -> int:
+        """
+        The number of bytes held by allocated (not mapped) pages.
+        """
+        return sum(page.itemsize * len(page) for page in self.pages.values() if isinstance(page, array))
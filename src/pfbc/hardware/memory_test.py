@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+
+from pfbc.hardware.machine import Machine, MEMORY_SIZE, SCREEN
+from pfbc.hardware.machine_test import SUM
+from pfbc.hardware.memory import PagedMemory
+
+
+class TestPagedMemory(unittest.TestCase):
+    def test_sparse(self):
+        memory = PagedMemory(1 << 32, width=32, page_bits=12)
+        self.assertEqual(1 << 32, len(memory))
+        self.assertEqual(0, memory[0xDEADBEEF])
+        self.assertEqual(0, memory.footprint)
+        memory[0xDEADBEEF] = 0xCAFEBABE
+        memory[0xDEADBEEF + 1] = 1
+        memory[5] = 2
+        self.assertEqual(0xCAFEBABE, memory[0xDEADBEEF])
+        self.assertEqual(1, memory[0xDEADBEEF + 1])
+        self.assertEqual(2, memory[5])
+        self.assertEqual(0, memory[6])
+        self.assertEqual(2, len(memory.pages))
+        self.assertEqual(2 * 4096 * 4, memory.footprint)
+
+    def test_bounds(self):
+        memory = PagedMemory()
+        self.assertEqual(MEMORY_SIZE, len(memory))
+        for address in [-1, MEMORY_SIZE]:
+            with self.assertRaises(IndexError):
+                memory[address]
+            with self.assertRaises(IndexError):
+                memory[address] = 1
+        with self.assertRaises(OverflowError):
+            memory[0] = 0x10000
+        with self.assertRaises(ValueError):
+            PagedMemory(width=8)
+
+    def test_slices(self):
+        memory = PagedMemory(page_bits=4)
+        memory[10:40] = range(30)
+        self.assertEqual(list(range(30)), memory[10:40])
+        self.assertEqual([0, 0, 1], memory[9:12])
+        self.assertEqual(3, len(memory.pages))
+        with self.assertRaises(ValueError):
+            memory[0:2] = [1]
+
+    def test_machine(self):
+        memory = PagedMemory()
+        memory[0] = 100
+        machine = Machine(SUM, memory)
+        machine.run(10000)
+        self.assertEqual(5050, memory[1])
+        self.assertEqual([0]*8192, machine.screen())
+        self.assertEqual(1, len(memory.pages))
+
+    def test_map(self):
+        memory = PagedMemory(1 << 32, width=32)
+        memory[0x10000] = 7
+        memory.map(0x10000, 1 << 20)
+        self.assertEqual(0, memory[0x10000])
+        memory[0x10000 + 12345] = 42
+        self.assertEqual(42, memory[0x10000 + 12345])
+        self.assertEqual(0, memory.footprint)
+        memory.close()
+        self.assertEqual(0, memory[0x10000 + 12345])
+
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, 'screen.bin')
+            memory = PagedMemory()
+            memory.map(SCREEN, 8192, path)
+            memory[SCREEN + 1] = 0xFFFF
+            memory.close()
+            self.assertEqual(8192 * 2, os.path.getsize(path))
+            memory = PagedMemory()
+            memory.map(SCREEN, 8192, path)
+            self.assertEqual([0, 0xFFFF], memory[SCREEN:SCREEN + 2])
+            memory.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
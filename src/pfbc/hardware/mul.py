@@ -0,0 +1,134 @@
+"""
+mul.py contains the Mul16 chip, an optional hardware multiplier.
+
+The HACK computer has no multiplication in hardware,
+leaving it to the Math.multiply routine of the operating system:
+a shift-and-add loop of 16 iterations of about 10 instructions each.
+Programs doing a lot of arithmetic (or graphics) spend most of their
+time in that loop, which a multiplier chip replaces by a single
+instruction, at the cost of (quite a lot of) extra gates.
+
+As Math.multiply, the chip computes the 16 least significant bits
+of the product, which is the correct two's complement product for
+both unsigned and signed operands as long as it does not overflow.
+
+Two designs are provided:
+
+- mul16_shift_add: the loop of Math.multiply laid out in hardware,
+  a chain of 15 adders, each adding the next shifted copy of a
+  (or 0, as selected by the next bit of b) to the sum so far.
+  Simple, but the carries ripple through every adder in turn;
+- mul16_wallace: a Wallace tree, reducing all partial products
+  three rows at a time with full adders (carry-save addition),
+  such that only the final two rows need a carry-propagating add16.
+
+Use cost() to compare both designs in gates and depth.
+Mul16 is the Wallace tree, being both smaller and shallower.
+"""
+
+from typing import Callable, Dict, List, Tuple
+
+from pfbc.hardware.chips import \
+    Bit, Bus16, \
+    And, Mux16
+from pfbc.hardware.alu import \
+    adder_half, adder_full, add16
+
+
+def _shift16(a: Bus16, n: int) -> Bus16:
+    """
+    Shifts a bus n bits to the left (towards the most significant bit).
+    """
+    return tuple(a[n:]) + tuple([False]*n)
+
+
+def mul16_shift_add(a: Bus16, b: Bus16) -> Bus16:
+    """
+    16-bit multiplier (shift-and-add array)
+
+    out = a * b (the 16 least significant bits)
+
+    ```
+    for i = 0..15:
+        out = out + ((a << i) if b[i] else 0)
+    ```
+
+    IN a[16], b[16];
+    OUT out[16];
+    """
+    zero = tuple([False]*16)
+    out = Mux16(zero, a, b[15])
+    for i in range(1, 16):
+        out = add16(out, Mux16(zero, _shift16(a, i), b[15-i]))
+    return out
+
+
+def mul16_wallace(a: Bus16, b: Bus16) -> Bus16:
+    """
+    16-bit multiplier (Wallace tree)
+
+    out = a * b (the 16 least significant bits)
+
+    The partial product of bit i of a and bit j of b is added into
+    column i+j. As long as any column holds more than two bits,
+    every three bits of a column are reduced by a full adder into
+    a sum bit for that column and a carry bit for the next column,
+    and a remaining pair by a half adder. Columns beyond the
+    16 least significant ones are dropped. The two rows left
+    are then added by a single add16.
+
+    IN a[16], b[16];
+    OUT out[16];
+    """
+    columns: List[List[Bit]] = [[] for _ in range(16)]
+    for i in range(16):
+        for j in range(16 - i):
+            columns[i+j].append(And(a[15-i], b[15-j]))
+
+    while any(len(column) > 2 for column in columns):
+        reduced: List[List[Bit]] = [[] for _ in range(16)]
+        for (w, column) in enumerate(columns):
+            k = 0
+            while len(column) - k >= 3:
+                s, c = adder_full(column[k], column[k+1], column[k+2])
+                reduced[w].append(s)
+                if w < 15:
+                    reduced[w+1].append(c)
+                k += 3
+            if len(column) - k == 2 and len(column) > 2:
+                s, c = adder_half(column[k], column[k+1])
+                reduced[w].append(s)
+                if w < 15:
+                    reduced[w+1].append(c)
+                k += 2
+            reduced[w].extend(column[k:])
+        columns = reduced
+
+    x = tuple(columns[w][0] if len(columns[w]) > 0 else False for w in range(15, -1, -1))
+    y = tuple(columns[w][1] if len(columns[w]) > 1 else False for w in range(15, -1, -1))
+    return add16(x, y)
+
+
+MULTIPLIERS = (mul16_shift_add, mul16_wallace)
+
+# the design used for the Mul16 chip: 2493 gates, 74 deep,
+# where the shift-and-add array takes 6443 gates and is 181 deep
+Mul16 = mul16_wallace
+
+
+def cost(chip: Callable) -> Tuple[int, int]:
+    """
+    The number of NAND gates of a chip, and its depth:
+    the number of gates on the longest path through it.
+    """
+    # tracing is only needed here, and not worth importing otherwise
+    from pfbc.hardware.netlist import trace
+    netlist = trace(chip)
+    return len(netlist.gates), netlist.depth()
+
+
+def costs() -> Dict[str, Tuple[int, int]]:
+    """
+    Gates and depth of every multiplier design.
+    """
+    return {chip.__name__: cost(chip) for chip in MULTIPLIERS}
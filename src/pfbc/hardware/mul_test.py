@@ -0,0 +1,38 @@
+import random
+import unittest
+
+from pfbc.hardware.codec import to_bus16, from_bus16, to_signed16, from_signed16
+from pfbc.hardware.mul import \
+    mul16_shift_add, mul16_wallace, Mul16, \
+    MULTIPLIERS, cost, costs
+
+
+class TestMul16(unittest.TestCase):
+    def test_corners(self):
+        for chip in MULTIPLIERS:
+            for (a, b) in [(0, 0), (0, 0xFFFF), (1, 0xFFFF), (0xFFFF, 0xFFFF), (0x100, 0x100), (255, 257)]:
+                out = from_bus16(chip(to_bus16(a), to_bus16(b)))
+                self.assertEqual((a*b) & 0xFFFF, out, f"{chip.__name__}: {a} * {b}")
+
+    def test_random(self):
+        rng = random.Random(16)
+        for chip in MULTIPLIERS:
+            for _ in range(100):
+                a, b = rng.getrandbits(16), rng.getrandbits(16)
+                out = from_bus16(chip(to_bus16(a), to_bus16(b)))
+                self.assertEqual((a*b) & 0xFFFF, out, f"{chip.__name__}: {a} * {b}")
+
+    def test_signed(self):
+        for (a, b) in [(-1, -1), (-3, 7), (181, -181), (-32768, 1)]:
+            out = Mul16(to_bus16(from_signed16(a)), to_bus16(from_signed16(b)))
+            self.assertEqual(a*b, to_signed16(from_bus16(out)), f"{a} * {b}")
+
+    def test_costs(self):
+        shift_add, wallace = cost(mul16_shift_add), cost(mul16_wallace)
+        self.assertEqual({'mul16_shift_add': shift_add, 'mul16_wallace': wallace}, costs())
+        self.assertLess(wallace[0], shift_add[0])
+        self.assertLess(wallace[1], shift_add[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+"""
+native.py implements every chip of chips.py and alu.py
+directly in Python, operating on whole words rather than
+going through the NAND gates they are built from.
+
+These implementations only exist to give the correct answer fast.
+Both multiplier designs of mul.py share the same implementation.
+They take and return exactly the same values as the chips they
+stand in for, such that both can be used interchangeably
+(see fidelity.py). As for the chips, data buses start from
+the most significant bit while selector buses start
+from the least significant bit.
+"""
+
+from pfbc.hardware.chips import \
+    Bit, Bus2, Bus3, Bus4, Bus8, Bus16
+from pfbc.hardware.codec import to_bus16, from_bus16
+
+
+def _sel(s) -> int:
+    return sum(1 << i for (i, bit) in enumerate(s) if bit)
+
+
+def Not(i: Bit) -> Bit:
+    return not i
+
+
+def And(a: Bit, b: Bit) -> Bit:
+    return bool(a and b)
+
+
+def Or(a: Bit, b: Bit) -> Bit:
+    return bool(a or b)
+
+
+def Xor(a: Bit, b: Bit) -> Bit:
+    return bool(a) != bool(b)
+
+
+def Mux(a: Bit, b: Bit, s: Bit) -> Bit:
+    return bool(b if s else a)
+
+
+def DMux(i: Bit, s: Bit) -> Bus2:
+    i = bool(i)
+    return (False, i) if s else (i, False)
+
+
+def Not16(a: Bus16) -> Bus16:
+    return tuple(not x for x in a)
+
+
+def And16(a: Bus16, b: Bus16) -> Bus16:
+    return tuple(bool(x and y) for (x, y) in zip(a, b))
+
+
+def Or16(a: Bus16, b: Bus16) -> Bus16:
+    return tuple(bool(x or y) for (x, y) in zip(a, b))
+
+
+def Mux16(a: Bus16, b: Bus16, s: Bit) -> Bus16:
+    return tuple(bool(x) for x in (b if s else a))
+
+
+def Or8Way(a: Bus8) -> Bit:
+    return any(a)
+
+
+def Mux4Way16(a: Bus16, b: Bus16, c: Bus16, d: Bus16, s: Bus2) -> Bus16:
+    return tuple(bool(x) for x in (a, b, c, d)[_sel(s)])
+
+
+def Mux8Way16(a: Bus16, b: Bus16, c: Bus16, d: Bus16, e: Bus16, f: Bus16, g: Bus16, h: Bus16, s: Bus3) -> Bus16:
+    return tuple(bool(x) for x in (a, b, c, d, e, f, g, h)[_sel(s)])
+
+
+def DMux4Way(i: Bit, s: Bus2) -> Bus4:
+    n = _sel(s)
+    return tuple(bool(i) and k == n for k in range(4))
+
+
+def DMux8Way(i: Bit, s: Bus3) -> Bus8:
+    n = _sel(s)
+    return tuple(bool(i) and k == n for k in range(8))
+
+
+def adder_half(a: Bit, b: Bit) -> Bus2:
+    return bool(a) != bool(b), bool(a and b)
+
+
+def adder_full(a: Bit, b: Bit, c: Bit) -> Bus2:
+    t = bool(a) + bool(b) + bool(c)
+    return t == 1 or t == 3, t > 1
+
+
+def add16(a: Bus16, b: Bus16) -> Bus16:
+    return to_bus16(from_bus16(a) + from_bus16(b))
+
+
+def inc16(a: Bus16) -> Bus16:
+    return to_bus16(from_bus16(a) + 1)
+
+
+def alu(x: Bus16, y: Bus16, zx: Bit, nx: Bit, zy: Bit, ny: Bit, f: Bit, no: Bit) -> (Bus16, Bit, Bit):
+    x = 0 if zx else from_bus16(x)
+    if nx:
+        x ^= 0xFFFF
+    y = 0 if zy else from_bus16(y)
+    if ny:
+        y ^= 0xFFFF
+    out = (x + y) & 0xFFFF if f else x & y
+    if no:
+        out ^= 0xFFFF
+    return to_bus16(out), out == 0, out >= 0x8000
+
+
+def mul16(a: Bus16, b: Bus16) -> Bus16:
+    return to_bus16(from_bus16(a) * from_bus16(b))
+
+
+mul16_shift_add = mul16_wallace = mul16
@@ -0,0 +1,32 @@
+from itertools import product
+import random
+import unittest
+
+from pfbc.hardware import native
+from pfbc.hardware.fidelity import CHIPS
+from pfbc.hardware.netlist import trace, random_args
+
+
+class TestNative(unittest.TestCase):
+    def test_matches_chips(self):
+        rng = random.Random(11)
+        for chip in CHIPS:
+            impl = getattr(native, chip.__name__)
+            widths = trace(chip).widths
+            if sum(1 if w is None else w for w in widths) <= 8:
+                flat = product([False, True], repeat=sum(1 if w is None else w for w in widths))
+                cases = []
+                for bits in flat:
+                    args, i = [], 0
+                    for w in widths:
+                        args.append(bits[i] if w is None else tuple(bits[i:i+w]))
+                        i += 1 if w is None else w
+                    cases.append(tuple(args))
+            else:
+                cases = random_args(widths, rng, 50)
+            for args in cases:
+                self.assertEqual(chip(*args), impl(*args), f"{chip.__name__}{args}")
+
+
+if __name__ == '__main__':
+    unittest.main()
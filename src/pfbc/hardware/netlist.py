@@ -0,0 +1,292 @@
+"""
+netlist.py flattens a chip into the network of NAND gates
+it is built from, called its netlist.
+
+A chip is traced by calling it a single time with symbolic wires
+instead of bits, while the NAND gate handed to us by nirvana is swapped
+(for the tracing thread only, see chips.gates) for one that records
+every gate rather than computing it. As every chip is built from NAND
+gates only, the recorded gates are the complete chip, wired exactly
+as described in chips.py and alu.py.
+
+Wires are numbered as follows:
+
+- wire 0 and wire 1 carry the constants False and True;
+- the next wires carry the input bits, argument per argument,
+  in the order in which the chip takes them;
+- every other wire is the output of a NAND gate, in the order
+  in which the gates were recorded.
+
+Gates are recorded in the order the chip evaluates them,
+so a gate only ever reads wires with a lower number.
+This makes it possible to evaluate a netlist in a single pass,
+which is what the simulators built on top of it rely on.
+"""
+
+import inspect
+import random
+import sys
+from types import CodeType
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from pfbc.hardware import chips
+
+
+FALSE = 0
+TRUE = 1
+
+Wire = int
+Gate = Tuple[Wire, Wire]
+
+
+class Netlist:
+    """
+    The NAND gates of a single chip, together with the wires
+    going in and out of the chip.
+
+    widths holds the width of every argument of the chip,
+    None for a single Bit and the bus width otherwise.
+    shape describes the structure of the output, None for a single
+    Bit and a tuple of shapes for a (nested) tuple of bits.
+    scopes holds for every gate the names of the chips it is part of,
+    outermost chip first.
+    """
+
+    def __init__(self, name: str, widths: Tuple[Optional[int], ...], gates: List[Gate],
+                 outputs: List[Wire], shape: Any, scopes: List[Tuple[str, ...]]):
+        self.name = name
+        self.widths = widths
+        self.gates = gates
+        self.outputs = outputs
+        self.shape = shape
+        self.scopes = scopes
+
+    @property
+    def n_inputs(self) -> int:
+        return sum(1 if w is None else w for w in self.widths)
+
+    @property
+    def first_gate(self) -> Wire:
+        """
+        Wire driven by the first gate of the netlist.
+        """
+        return 2 + self.n_inputs
+
+    @property
+    def n_wires(self) -> int:
+        return self.first_gate + len(self.gates)
+
+    def flatten_inputs(self, *args) -> List[bool]:
+        """
+        Flattens the arguments of a chip call into a list of input bits.
+        """
+        if len(args) != len(self.widths):
+            raise TypeError(f"{self.name} takes {len(self.widths)} arguments ({len(args)} given)")
+        bits = []
+        for (arg, width) in zip(args, self.widths):
+            if width is None:
+                bits.append(bool(arg))
+            elif len(arg) != width:
+                raise ValueError(f"{self.name} expects a bus of {width} bits, got {len(arg)} bits")
+            else:
+                bits.extend(bool(x) for x in arg)
+        return bits
+
+    def restructure(self, bits: Sequence[bool]) -> Any:
+        """
+        Gives the output bits of the chip the structure of its output.
+        """
+        return _unflatten(self.shape, iter(bits))
+
+    def evaluate_bits(self, bits: Sequence[bool]) -> List[bool]:
+        """
+        Evaluates the netlist for the given input bits,
+        returning the value of every wire.
+        """
+        values = [False, True] + list(bits) + [False]*len(self.gates)
+        for (i, (a, b)) in enumerate(self.gates, self.first_gate):
+            values[i] = not (values[a] and values[b])
+        return values
+
+    def evaluate_outputs(self, bits: Sequence[bool]) -> List[bool]:
+        """
+        Evaluates the netlist for the given input bits,
+        returning the output bits.
+        """
+        values = self.evaluate_bits(bits)
+        return [values[w] for w in self.outputs]
+
+    def evaluate(self, *args) -> Any:
+        """
+        Evaluates the netlist as if the chip itself was called.
+        """
+        return self.restructure(self.evaluate_outputs(self.flatten_inputs(*args)))
+
+    def levels(self) -> List[int]:
+        """
+        The level of every wire: 0 for the constants and inputs,
+        and one more than the highest level of its inputs for a gate.
+        """
+        level = [0] * self.n_wires
+        for (i, (a, b)) in enumerate(self.gates, self.first_gate):
+            level[i] = max(level[a], level[b]) + 1
+        return level
+
+    def depth(self) -> int:
+        """
+        The number of gates on the longest path through the chip.
+        """
+        return max(self.levels(), default=0)
+
+    def compile(self) -> Callable:
+        """
+        Compiles the netlist into a Python function that takes the
+        same arguments and returns the same output as the chip itself,
+        evaluating every gate as a single line of straight-line code.
+        """
+        return function(self.code(), self.name)
+
+    def code(self) -> CodeType:
+        """
+        The code object defining the function returned by compile.
+        """
+        params = [f"a{i}" for i in range(len(self.widths))]
+        lines = [f"def {self.name}({', '.join(params)}):", "    w0, w1 = False, True"]
+        wire = 2
+        for (param, width) in zip(params, self.widths):
+            if width is None:
+                lines.append(f"    w{wire} = {param}")
+                wire += 1
+            else:
+                wires = ', '.join(f"w{wire+i}" for i in range(width))
+                lines.append(f"    ({wires},) = {param}")
+                wire += width
+        for (i, (a, b)) in enumerate(self.gates, self.first_gate):
+            lines.append(f"    w{i} = not (w{a} and w{b})")
+        lines.append(f"    return {_source(self.shape, iter(self.outputs))}")
+        return compile('\n'.join(lines), f"<netlist {self.name}>", 'exec')
+
+    def __len__(self) -> int:
+        return len(self.gates)
+
+    def __repr__(self) -> str:
+        return f"<Netlist {self.name}: {self.n_inputs} inputs, {len(self.gates)} gates, {len(self.outputs)} outputs>"
+
+
+def function(code: CodeType, name: str) -> Callable:
+    """
+    The function of the given name defined by the code
+    of a compiled netlist (see Netlist.code).
+    """
+    namespace = {}
+    exec(code, namespace)
+    return namespace[name]
+
+
+def random_args(widths: Sequence[Optional[int]], rng: random.Random, n: int) -> List[tuple]:
+    """
+    n random argument tuples for a chip taking arguments
+    of the given widths (see Netlist.widths).
+    """
+    return [
+        tuple(rng.random() < 0.5 if w is None else tuple(rng.random() < 0.5 for _ in range(w))
+              for w in widths)
+        for _ in range(n)]
+
+
+class _Wire:
+    """
+    Symbolic bit used in place of an actual bit while tracing.
+    """
+    __slots__ = ('index',)
+
+    def __init__(self, index: Wire):
+        self.index = index
+
+
+class _Tracer:
+    """
+    Stand-in for the NAND gate of nirvana, recording every gate.
+    """
+
+    def __init__(self, first_gate: Wire, root):
+        self.first_gate = first_gate
+        self.root = root
+        self.gates = []
+        self.scopes = []
+
+    def nand(self, a, b) -> _Wire:
+        self.gates.append((_index(a), _index(b)))
+        self.scopes.append(self._scope())
+        return _Wire(self.first_gate + len(self.gates) - 1)
+
+    def _scope(self) -> Tuple[str, ...]:
+        names = []
+        frame = sys._getframe(2)
+        while frame is not None and frame is not self.root:
+            name = frame.f_code.co_name
+            if not name.startswith(('<', '_')):
+                names.append(name)
+            frame = frame.f_back
+        return tuple(reversed(names))
+
+
+def _index(bit) -> Wire:
+    if isinstance(bit, _Wire):
+        return bit.index
+    return TRUE if bit else FALSE
+
+
+def _width(annotation) -> Optional[int]:
+    if annotation is chips.Bit:
+        return None
+    args = getattr(annotation, '__args__', None)
+    if not args:
+        raise TypeError(f"cannot trace argument annotated as {annotation!r}")
+    return len(args)
+
+
+def _flatten(value, wires: List[Wire]) -> Any:
+    if isinstance(value, (tuple, list)):
+        return tuple(_flatten(x, wires) for x in value)
+    wires.append(_index(value))
+    return None
+
+
+def _unflatten(shape, bits) -> Any:
+    if shape is None:
+        return next(bits)
+    return tuple(_unflatten(s, bits) for s in shape)
+
+
+def _source(shape, wires) -> str:
+    if shape is None:
+        return f"w{next(wires)}"
+    return '(' + ''.join(_source(s, wires) + ', ' for s in shape) + ')'
+
+
+def trace(chip: Callable) -> Netlist:
+    """
+    Traces a chip into its netlist.
+
+    The width of every input is taken from the type annotations
+    of the chip, which is why every chip is annotated using the
+    Bit and Bus types defined in chips.py.
+    """
+    widths = tuple(_width(p.annotation) for p in inspect.signature(chip).parameters.values())
+    args, wire = [], 2
+    for width in widths:
+        if width is None:
+            args.append(_Wire(wire))
+            wire += 1
+        else:
+            args.append(tuple(_Wire(wire+i) for i in range(width)))
+            wire += width
+
+    tracer = _Tracer(wire, sys._getframe())
+    with chips.gates.using(tracer.nand):
+        result = chip(*args)
+
+    outputs = []
+    shape = _flatten(result, outputs)
+    return Netlist(chip.__name__, widths, tracer.gates, outputs, shape, tracer.scopes)
@@ -0,0 +1,113 @@
+from itertools import product
+import random
+import threading
+import unittest
+
+from pfbc.hardware import nirvana, chips
+from pfbc.hardware.chips import \
+    Not, And, Or, Xor, Mux, DMux, \
+    Not16, Mux16, Or8Way, Mux8Way16
+from pfbc.hardware.alu import adder_full, add16, alu
+from pfbc.hardware.netlist import trace, random_args, FALSE, TRUE
+
+
+class TestTrace(unittest.TestCase):
+    def test_gate_counts(self):
+        for (chip, count) in [(Not, 1), (And, 2), (Or, 3), (Xor, 6), (Mux, 8), (Not16, 16)]:
+            self.assertEqual(count, len(trace(chip)), chip.__name__)
+
+    def test_wires(self):
+        netlist = trace(And)
+        self.assertEqual((None, None), netlist.widths)
+        self.assertEqual([(2, 3), (4, 4)], netlist.gates)
+        self.assertEqual([5], netlist.outputs)
+        self.assertEqual(6, netlist.n_wires)
+
+    def test_constants(self):
+        netlist = trace(alu)
+        used = {w for gate in netlist.gates for w in gate}
+        self.assertIn(FALSE, used)
+        self.assertNotIn(TRUE, used)
+
+    def test_gates_are_ordered(self):
+        netlist = trace(add16)
+        for (i, (a, b)) in enumerate(netlist.gates, netlist.first_gate):
+            self.assertLess(a, i)
+            self.assertLess(b, i)
+
+    def test_scopes(self):
+        netlist = trace(adder_full)
+        self.assertEqual(len(netlist.gates), len(netlist.scopes))
+        self.assertTrue(all(scope[0] == 'adder_full' for scope in netlist.scopes))
+        self.assertIn(('adder_full', 'adder_half', 'Xor'), netlist.scopes)
+
+    def test_depth(self):
+        for (chip, depth) in [(Not, 1), (And, 2), (Xor, 4), (Not16, 1)]:
+            self.assertEqual(depth, trace(chip).depth(), chip.__name__)
+
+    def test_nirvana_restored(self):
+        trace(Mux16)
+        self.assertIs(nirvana, chips.nirvana)
+        self.assertIs(nirvana.nand, chips.gates.nand)
+
+    def test_threads(self):
+        # tracing in one thread leaves the chips of any other untouched
+        expected = len(trace(add16))
+        done = threading.Event()
+        counts = []
+
+        def tracing():
+            try:
+                for _ in range(20):
+                    counts.append(len(trace(add16)))
+            finally:
+                done.set()
+        thread = threading.Thread(target=tracing)
+        thread.start()
+        results = set()
+        while not done.is_set():
+            results.add(And(True, True))
+            results.add(Xor(True, False))
+        thread.join()
+        self.assertEqual({True}, results)
+        self.assertEqual([expected]*20, counts)
+
+
+class TestEvaluate(unittest.TestCase):
+    def test_exhaustive(self):
+        for chip in [Not, And, Or, Xor, Mux, DMux, adder_full]:
+            netlist = trace(chip)
+            for args in product([False, True], repeat=len(netlist.widths)):
+                self.assertEqual(chip(*args), netlist.evaluate(*args), f"{chip.__name__}{args}")
+
+    def test_outputs(self):
+        netlist = trace(adder_full)
+        for args in product([False, True], repeat=3):
+            self.assertEqual(list(adder_full(*args)), netlist.evaluate_outputs(args), args)
+
+    def test_random(self):
+        rng = random.Random(42)
+        for chip in [Or8Way, Mux8Way16, add16, alu]:
+            netlist = trace(chip)
+            for args in random_args(netlist.widths, rng, 20):
+                self.assertEqual(chip(*args), netlist.evaluate(*args), f"{chip.__name__}{args}")
+
+    def test_compile(self):
+        rng = random.Random(1)
+        for chip in [Not, DMux, Mux16, Or8Way, add16, alu]:
+            netlist = trace(chip)
+            compiled = netlist.compile()
+            self.assertEqual(chip.__name__, compiled.__name__)
+            for args in random_args(netlist.widths, rng, 20):
+                self.assertEqual(chip(*args), compiled(*args), f"{chip.__name__}{args}")
+
+    def test_bad_arguments(self):
+        netlist = trace(Mux16)
+        with self.assertRaises(TypeError):
+            netlist.evaluate((False,)*16)
+        with self.assertRaises(ValueError):
+            netlist.evaluate((False,)*16, (False,)*15, True)
+
+
+if __name__ == '__main__':
+    unittest.main()
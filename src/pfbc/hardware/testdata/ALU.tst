@@ -0,0 +1,28 @@
+// The 18 functions of the HACK ALU, for x = 17 and y = 3.
+
+load ALU.hdl,
+output-file ALU.out,
+compare-to ALU.cmp,
+output-list x%D1.6.1 y%D1.6.1 zx%B1.1.1 nx%B1.1.1 zy%B1.1.1 ny%B1.1.1 f%B1.1.1 no%B1.1.1 out%D1.6.1 zr%B1.1.1 ng%B1.1.1;
+
+set x 17,
+set y 3;
+
+set zx 1, set nx 0, set zy 1, set ny 0, set f 1, set no 0, eval, output;
+set zx 1, set nx 1, set zy 1, set ny 1, set f 1, set no 1, eval, output;
+set zx 1, set nx 1, set zy 1, set ny 0, set f 1, set no 0, eval, output;
+set zx 0, set nx 0, set zy 1, set ny 1, set f 0, set no 0, eval, output;
+set zx 1, set nx 1, set zy 0, set ny 0, set f 0, set no 0, eval, output;
+set zx 0, set nx 0, set zy 1, set ny 1, set f 0, set no 1, eval, output;
+set zx 1, set nx 1, set zy 0, set ny 0, set f 0, set no 1, eval, output;
+set zx 0, set nx 0, set zy 1, set ny 1, set f 1, set no 1, eval, output;
+set zx 1, set nx 1, set zy 0, set ny 0, set f 1, set no 1, eval, output;
+set zx 0, set nx 1, set zy 1, set ny 1, set f 1, set no 1, eval, output;
+set zx 1, set nx 1, set zy 0, set ny 1, set f 1, set no 1, eval, output;
+set zx 0, set nx 0, set zy 1, set ny 1, set f 1, set no 0, eval, output;
+set zx 1, set nx 1, set zy 0, set ny 0, set f 1, set no 0, eval, output;
+set zx 0, set nx 0, set zy 0, set ny 0, set f 1, set no 0, eval, output;
+set zx 0, set nx 1, set zy 0, set ny 0, set f 1, set no 1, eval, output;
+set zx 0, set nx 0, set zy 0, set ny 1, set f 1, set no 1, eval, output;
+set zx 0, set nx 0, set zy 0, set ny 0, set f 0, set no 0, eval, output;
+set zx 0, set nx 1, set zy 0, set ny 1, set f 0, set no 1, eval, output;
@@ -0,0 +1,24 @@
+// Routes in through every selector value, with in set and unset.
+
+load DMux8Way.hdl,
+output-file DMux8Way.out,
+compare-to DMux8Way.cmp,
+output-list in%B2.1.2 sel%B2.3.2 a%B2.1.2 b%B2.1.2 c%B2.1.2 d%B2.1.2 e%B2.1.2 f%B2.1.2 g%B2.1.2 h%B2.1.2;
+
+set in 0, set sel %B000, eval, output;
+set in 0, set sel %B001, eval, output;
+set in 0, set sel %B010, eval, output;
+set in 0, set sel %B011, eval, output;
+set in 0, set sel %B100, eval, output;
+set in 0, set sel %B101, eval, output;
+set in 0, set sel %B110, eval, output;
+set in 0, set sel %B111, eval, output;
+
+set in 1, set sel %B000, eval, output;
+set in 1, set sel %B001, eval, output;
+set in 1, set sel %B010, eval, output;
+set in 1, set sel %B011, eval, output;
+set in 1, set sel %B100, eval, output;
+set in 1, set sel %B101, eval, output;
+set in 1, set sel %B110, eval, output;
+set in 1, set sel %B111, eval, output;
@@ -0,0 +1,543 @@
+"""
+testscript.py runs the test scripts (.tst) and compare files (.cmp)
+as used by the nand2tetris course to describe the behaviour of a chip.
+
+A test script loads a chip, sets its input pins, evaluates it
+and outputs the value of some of its pins, one line per output command.
+These lines are compared against the compare file of the script,
+line by line as they are produced. Neither the output nor the compare
+file is ever kept in memory as a whole, such that even compare files
+of hundreds of megabytes can be checked, and the run stops
+at the first line that differs.
+
+The HDL chip names used by the course are mapped to the chips
+implemented in chips.py and alu.py, together with the names
+and widths of their pins. Note that the course numbers the bits of
+a bus starting from the least significant bit, while the data buses of
+our chips start from the most significant bit. Selector buses on the
+other hand do start from the least significant bit, which is why every
+pin records its own bit order.
+
+Chips are called through the registry of fidelity.py, such that
+the mode set for a chip (or for all chips) applies to the scripts
+testing it, e.g. to run them against the native implementation:
+
+    python -m pfbc.hardware.testscript --mode native ALU.tst
+
+Example:
+
+```
+load And.hdl,
+output-file And.out,
+compare-to And.cmp,
+output-list a%B3.1.3 b%B3.1.3 out%B3.1.3;
+
+set a 0, set b 0, eval, output;
+set a 1, set b 1, eval, output;
+```
+"""
+
+import argparse
+import os
+import sys
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from pfbc.hardware import nirvana, fidelity
+from pfbc.hardware.mul import Mul16
+
+
+class ScriptError(Exception):
+    """
+    Raised for a test script that can't be parsed or executed.
+    """
+
+    def __init__(self, message: str, line: Optional[int] = None):
+        super().__init__(message if line is None else f"line {line}: {message}")
+        self.line = line
+
+
+class ComparisonError(AssertionError):
+    """
+    Raised for the first output line that differs from the compare file.
+    """
+
+    def __init__(self, line: int, expected: str, actual: str):
+        super().__init__(f"comparison failure at line {line}:\nexpected: {expected}\nactual:   {actual}")
+        self.line = line
+        self.expected = expected
+        self.actual = actual
+
+
+class Pin(NamedTuple):
+    name: str
+    width: int = 1
+    lsb_first: bool = False
+
+
+class ChipSpec(NamedTuple):
+    """
+    The pins of an HDL chip, mapped onto a Python chip
+    taking the input pins as arguments, in order,
+    and returning the output pins, in order.
+    """
+    chip: Callable
+    inputs: Tuple[Pin, ...]
+    outputs: Tuple[Pin, ...]
+
+
+def _bus(*names, width=16):
+    return tuple(Pin(name, width) for name in names)
+
+
+def _sel(width):
+    return Pin('sel', width, lsb_first=True)
+
+
+_chip = fidelity.chip
+
+
+CHIPS: Dict[str, ChipSpec] = {
+    'Nand': ChipSpec(nirvana.nand, _bus('a', 'b', width=1), _bus('out', width=1)),
+    'Not': ChipSpec(_chip('Not'), _bus('in', width=1), _bus('out', width=1)),
+    'And': ChipSpec(_chip('And'), _bus('a', 'b', width=1), _bus('out', width=1)),
+    'Or': ChipSpec(_chip('Or'), _bus('a', 'b', width=1), _bus('out', width=1)),
+    'Xor': ChipSpec(_chip('Xor'), _bus('a', 'b', width=1), _bus('out', width=1)),
+    'Mux': ChipSpec(_chip('Mux'), _bus('a', 'b', 'sel', width=1), _bus('out', width=1)),
+    'DMux': ChipSpec(_chip('DMux'), _bus('in', 'sel', width=1), _bus('a', 'b', width=1)),
+    'Not16': ChipSpec(_chip('Not16'), _bus('in'), _bus('out')),
+    'And16': ChipSpec(_chip('And16'), _bus('a', 'b'), _bus('out')),
+    'Or16': ChipSpec(_chip('Or16'), _bus('a', 'b'), _bus('out')),
+    'Mux16': ChipSpec(_chip('Mux16'), _bus('a', 'b') + _bus('sel', width=1), _bus('out')),
+    'Or8Way': ChipSpec(_chip('Or8Way'), _bus('in', width=8), _bus('out', width=1)),
+    'Mux4Way16': ChipSpec(_chip('Mux4Way16'), _bus('a', 'b', 'c', 'd') + (_sel(2),), _bus('out')),
+    'Mux8Way16': ChipSpec(_chip('Mux8Way16'), _bus('a', 'b', 'c', 'd', 'e', 'f', 'g', 'h') + (_sel(3),), _bus('out')),
+    'DMux4Way': ChipSpec(_chip('DMux4Way'), (Pin('in'), _sel(2)), _bus('a', 'b', 'c', 'd', width=1)),
+    'DMux8Way': ChipSpec(_chip('DMux8Way'), (Pin('in'), _sel(3)), _bus('a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', width=1)),
+    'HalfAdder': ChipSpec(_chip('adder_half'), _bus('a', 'b', width=1), _bus('sum', 'carry', width=1)),
+    'FullAdder': ChipSpec(_chip('adder_full'), _bus('a', 'b', 'c', width=1), _bus('sum', 'carry', width=1)),
+    'Add16': ChipSpec(_chip('add16'), _bus('a', 'b'), _bus('out')),
+    'Inc16': ChipSpec(_chip('inc16'), _bus('in'), _bus('out')),
+    'ALU': ChipSpec(
+        _chip('alu'),
+        _bus('x', 'y') + _bus('zx', 'nx', 'zy', 'ny', 'f', 'no', width=1),
+        _bus('out') + _bus('zr', 'ng', width=1)),
+    'Mul16': ChipSpec(_chip(Mul16.__name__), _bus('a', 'b'), _bus('out')),
+}
+
+
+def to_bits(value: int, pin: Pin):
+    """
+    Converts an integer into the argument expected for the given pin.
+    """
+    if pin.width == 1:
+        return bool(value & 1)
+    bits = tuple(bool(value >> i & 1) for i in range(pin.width))
+    return bits if pin.lsb_first else bits[::-1]
+
+
+def from_bits(bits, pin: Pin) -> int:
+    """
+    Converts the value of the given pin into an integer.
+    """
+    if pin.width == 1:
+        return int(bool(bits))
+    if not pin.lsb_first:
+        bits = bits[::-1]
+    return sum(1 << i for (i, bit) in enumerate(bits) if bit)
+
+
+class Combinational:
+    """
+    Harness around a combinational chip, keeping the value
+    of every pin as an integer.
+    """
+
+    def __init__(self, name: str, spec: ChipSpec):
+        self.name = name
+        self.spec = spec
+        self.pins = {pin.name: pin for pin in spec.inputs + spec.outputs}
+        self.values = {name: 0 for name in self.pins}
+
+    def set(self, name: str, value: int):
+        pin = self.pins[name]
+        if pin not in self.spec.inputs:
+            raise KeyError(f"{name} is not an input pin of {self.name}")
+        self.values[name] = value & ((1 << pin.width) - 1)
+
+    def get(self, name: str) -> int:
+        return self.values[name]
+
+    def eval(self):
+        args = [to_bits(self.values[pin.name], pin) for pin in self.spec.inputs]
+        out = self.spec.chip(*args)
+        if len(self.spec.outputs) == 1:
+            out = (out,)
+        for (pin, bits) in zip(self.spec.outputs, out):
+            self.values[pin.name] = from_bits(bits, pin)
+
+    def tick(self):
+        raise TypeError(f"{self.name} is not a clocked chip")
+
+    tock = tick
+
+
+def load(name: str):
+    """
+    Creates the harness for the chip with the given HDL name.
+    """
+    spec = CHIPS.get(name)
+    if spec is None:
+        raise KeyError(f"unknown chip {name}")
+    return Combinational(name, spec)
+
+
+class Command(NamedTuple):
+    name: str
+    args: Tuple[str, ...]
+    line: int
+    body: Tuple['Command', ...] = ()
+
+
+_SEPARATORS = ',;!'
+
+
+def _tokenize(source: str) -> Iterator[Tuple[str, int]]:
+    i, line, n = 0, 1, len(source)
+    while i < n:
+        c = source[i]
+        if c == '\n':
+            line += 1
+            i += 1
+        elif c.isspace():
+            i += 1
+        elif source.startswith('//', i):
+            while i < n and source[i] != '\n':
+                i += 1
+        elif source.startswith('/*', i):
+            end = source.find('*/', i+2)
+            if end < 0:
+                raise ScriptError("unterminated comment", line)
+            line += source.count('\n', i, end)
+            i = end + 2
+        elif c == '"':
+            end = source.find('"', i+1)
+            if end < 0:
+                raise ScriptError("unterminated string", line)
+            yield source[i:end+1], line
+            i = end + 1
+        elif c in _SEPARATORS or c in '{}':
+            yield c, line
+            i += 1
+        else:
+            start = i
+            while i < n and not source[i].isspace() and source[i] not in _SEPARATORS + '{}"':
+                i += 1
+            yield source[start:i], line
+
+
+def parse(source: str) -> List[Command]:
+    """
+    Parses a test script into a list of commands.
+    Repeat and while loops hold their commands as a body.
+    """
+    tokens = list(_tokenize(source))
+    pos = 0
+
+    def block(nested: bool) -> List[Command]:
+        nonlocal pos
+        commands = []
+        while pos < len(tokens):
+            token, line = tokens[pos]
+            if token == '}':
+                if not nested:
+                    raise ScriptError("unexpected '}'", line)
+                pos += 1
+                return commands
+            pos += 1
+            if token in _SEPARATORS:
+                continue
+            args = []
+            while pos < len(tokens) and tokens[pos][0] not in _SEPARATORS + '{}':
+                args.append(tokens[pos][0])
+                pos += 1
+            if token in ('repeat', 'while'):
+                if pos >= len(tokens) or tokens[pos][0] != '{':
+                    raise ScriptError(f"expected '{{' after {token}", line)
+                pos += 1
+                commands.append(Command(token, tuple(args), line, tuple(block(True))))
+            else:
+                commands.append(Command(token, tuple(args), line))
+        if nested:
+            raise ScriptError("missing '}'", tokens[-1][1])
+        return commands
+
+    return block(False)
+
+
+def parse_value(text: str) -> int:
+    """
+    Parses a value as written in a test script: %B for binary,
+    %X for hexadecimal and %D or nothing for decimal.
+    """
+    try:
+        if text.startswith('%B'):
+            return int(text[2:], 2)
+        if text.startswith('%X'):
+            return int(text[2:], 16)
+        if text.startswith('%D'):
+            return int(text[2:])
+        return int(text)
+    except ValueError:
+        raise ValueError(f"invalid value {text}") from None
+
+
+class Column(NamedTuple):
+    """
+    A single column of the output list, e.g. out%B1.16.1.
+    """
+    pin: str
+    index: Optional[int]
+    fmt: str
+    left: int
+    length: int
+    right: int
+
+    @classmethod
+    def parse(cls, text: str) -> 'Column':
+        name, _, fmt = text.partition('%')
+        if not fmt:
+            fmt = 'B1.1.1'
+        try:
+            left, length, right = (int(x) for x in fmt[1:].split('.'))
+        except ValueError:
+            raise ValueError(f"invalid output format {text}") from None
+        index = None
+        if name.endswith(']') and '[' in name:
+            name, _, index = name[:-1].partition('[')
+            index = int(index)
+        return cls(name, index, fmt[0], left, length, right)
+
+    @property
+    def width(self) -> int:
+        return self.left + self.length + self.right
+
+    def header(self) -> str:
+        title = self.pin if self.index is None else f"{self.pin}[{self.index}]"
+        title = title[:self.width]
+        left = (self.width - len(title)) // 2
+        return ' '*left + title + ' '*(self.width - left - len(title))
+
+    def format(self, value, width: int) -> str:
+        if self.fmt == 'S':
+            text = str(value)[:self.length].ljust(self.length)
+        elif self.fmt == 'B':
+            text = "{0:0{1}b}".format(value & ((1 << self.length) - 1), self.length)
+        elif self.fmt == 'X':
+            text = "{0:0{1}X}".format(value & ((1 << 4*self.length) - 1), self.length)
+        elif self.fmt == 'D':
+            if width == 16 and value & 0x8000:
+                value -= 0x10000
+            text = str(value).rjust(self.length)[-self.length:]
+        else:
+            raise ValueError(f"unknown output format %{self.fmt}")
+        return ' '*self.left + text + ' '*self.right
+
+
+def _matches(expected: str, actual: str) -> bool:
+    if len(expected) != len(actual):
+        return False
+    return all(e == a or e == '*' for (e, a) in zip(expected, actual))
+
+
+class Runner:
+    """
+    Executes a single test script.
+
+    Output lines are compared against the compare file as they are
+    produced, and only written to the output file of the script
+    when write_output is set.
+    """
+
+    def __init__(self, directory: str = '.', write_output: bool = False):
+        self.directory = directory
+        self.write_output = write_output
+        self.chip = None
+        self.columns = []
+        self.time = 0
+        self.half = False
+        self.lines = 0
+        self._cmp = None
+        self._cmp_file = None
+        self._out = None
+
+    def run(self, commands: Sequence[Command]) -> int:
+        """
+        Runs the commands, returning the number of output lines
+        that were compared.
+        """
+        try:
+            self._block(commands)
+            if self._cmp is not None:
+                for expected in self._cmp:
+                    expected = expected.rstrip()
+                    if expected:
+                        raise ComparisonError(self.lines + 1, expected, "<end of output>")
+        finally:
+            self.close()
+        return self.lines
+
+    def close(self):
+        for f in (self._cmp_file, self._out):
+            if f is not None:
+                f.close()
+        self._cmp = self._cmp_file = self._out = None
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _block(self, commands: Sequence[Command]):
+        for command in commands:
+            handler = getattr(self, '_cmd_' + command.name.replace('-', '_'), None)
+            if handler is None:
+                raise ScriptError(f"unknown command {command.name}", command.line)
+            if self.chip is None and command.name not in ('load', 'output-file', 'compare-to', 'echo'):
+                raise ScriptError(f"{command.name} before any chip is loaded", command.line)
+            try:
+                handler(command)
+            except (KeyError, ValueError, TypeError) as e:
+                raise ScriptError(str(e).strip("'"), command.line) from e
+
+    def _cmd_load(self, command: Command):
+        name = os.path.splitext(command.args[0])[0] if command.args else None
+        if name is None:
+            raise ValueError("load requires a chip")
+        self.chip = load(name)
+
+    def _cmd_output_file(self, command: Command):
+        if self.write_output:
+            self._out = open(self._path(command.args[0]), 'w')
+
+    def _cmd_compare_to(self, command: Command):
+        self._cmp_file = open(self._path(command.args[0]))
+        self._cmp = iter(self._cmp_file)
+
+    def _cmd_output_list(self, command: Command):
+        self.columns = [Column.parse(arg) for arg in command.args]
+        self._emit('|' + '|'.join(c.header() for c in self.columns) + '|')
+
+    def _cmd_set(self, command: Command):
+        pin, value = command.args
+        self.chip.set(pin, parse_value(value))
+
+    def _cmd_eval(self, command: Command):
+        self.chip.eval()
+
+    def _cmd_tick(self, command: Command):
+        self.chip.eval()
+        self.chip.tick()
+        self.half = True
+
+    def _cmd_tock(self, command: Command):
+        self.chip.tock()
+        self.chip.eval()
+        self.half = False
+        self.time += 1
+
+    def _cmd_output(self, command: Command):
+        cells = []
+        for column in self.columns:
+            if column.pin == 'time':
+                cells.append(column.format(f"{self.time}{'+' if self.half else ''}", 0))
+                continue
+            value = self.chip.get(column.pin)
+            width = self.chip.pins[column.pin].width
+            if column.index is not None:
+                value, width = value >> column.index & 1, 1
+            cells.append(column.format(value, width))
+        self._emit('|' + '|'.join(cells) + '|')
+
+    def _cmd_echo(self, command: Command):
+        print(' '.join(arg.strip('"') for arg in command.args))
+
+    def _cmd_clear_echo(self, command: Command):
+        pass
+
+    def _cmd_breakpoint(self, command: Command):
+        pass
+
+    def _cmd_clear_breakpoints(self, command: Command):
+        pass
+
+    def _cmd_repeat(self, command: Command):
+        if command.args:
+            for _ in range(int(command.args[0])):
+                self._block(command.body)
+        else:
+            while True:
+                self._block(command.body)
+
+    def _cmd_while(self, command: Command):
+        while self._condition(command.args):
+            self._block(command.body)
+
+    def _condition(self, args: Sequence[str]) -> bool:
+        if len(args) != 3:
+            raise ValueError(f"invalid condition {' '.join(args)}")
+        pin, op, value = args
+        left, right = self.chip.get(pin), parse_value(value)
+        if op in ('=', '=='):
+            return left == right
+        if op == '<>':
+            return left != right
+        if op == '<':
+            return left < right
+        if op == '>':
+            return left > right
+        if op == '<=':
+            return left <= right
+        if op == '>=':
+            return left >= right
+        raise ValueError(f"unknown operator {op}")
+
+    def _emit(self, line: str):
+        self.lines += 1
+        if self._out is not None:
+            self._out.write(line + '\n')
+        if self._cmp is not None:
+            expected = next(self._cmp, None)
+            expected = "<end of file>" if expected is None else expected.rstrip()
+            if not _matches(expected, line):
+                raise ComparisonError(self.lines, expected, line)
+
+
+def run(path: str, write_output: bool = False) -> int:
+    """
+    Runs the test script at the given path, resolving the files
+    it refers to relative to the directory of the script.
+    Returns the number of output lines produced.
+    """
+    with open(path) as f:
+        commands = parse(f.read())
+    return Runner(os.path.dirname(path) or '.', write_output).run(commands)
+
+
+def main(argv: Sequence[str]) -> int:
+    parser = argparse.ArgumentParser(prog='python -m pfbc.hardware.testscript', description=__doc__.split('\n\n')[0])
+    parser.add_argument('--mode', choices=fidelity.MODES, help="the implementation of every chip, gate-level by default")
+    parser.add_argument('scripts', nargs='*', metavar='script', help="the .tst files to run")
+    args = parser.parse_args(argv)
+    if args.mode is not None:
+        fidelity.set_mode(args.mode)
+    status = 0
+    for path in args.scripts:
+        try:
+            lines = run(path, write_output=True)
+            print(f"{path}: {lines} lines ok")
+        except (ScriptError, ComparisonError, OSError) as e:
+            print(f"{path}: {e}", file=sys.stderr)
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,173 @@
+import glob
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from pfbc.hardware import fidelity, native
+from pfbc.hardware.testscript import \
+    parse, parse_value, run, load, main, Column, \
+    ScriptError, ComparisonError
+
+
+TESTDATA = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'testdata')
+
+
+class TestParse(unittest.TestCase):
+    def test_commands(self):
+        commands = parse("""
+            // comment
+            load And.hdl, /* block
+            comment */ output-list a%B3.1.3;
+            set a %B1, eval, output;
+        """)
+        self.assertEqual(
+            [('load', ('And.hdl',), 3), ('output-list', ('a%B3.1.3',), 4),
+             ('set', ('a', '%B1'), 5), ('eval', (), 5), ('output', (), 5)],
+            [(c.name, c.args, c.line) for c in commands])
+
+    def test_repeat(self):
+        commands = parse("repeat 3 { eval, output; } output;")
+        self.assertEqual(['repeat', 'output'], [c.name for c in commands])
+        self.assertEqual(('3',), commands[0].args)
+        self.assertEqual(['eval', 'output'], [c.name for c in commands[0].body])
+
+    def test_errors(self):
+        for source in ["repeat 3 { eval;", "eval; }", "/* eval;", "repeat 3 eval;"]:
+            with self.assertRaises(ScriptError, msg=source):
+                parse(source)
+
+    def test_values(self):
+        self.assertEqual(5, parse_value('%B101'))
+        self.assertEqual(255, parse_value('%XFF'))
+        self.assertEqual(-3, parse_value('%D-3'))
+        self.assertEqual(12, parse_value('12'))
+        with self.assertRaises(ValueError):
+            parse_value('%B12')
+
+
+class TestColumn(unittest.TestCase):
+    def test_format(self):
+        self.assertEqual('        x         ', Column.parse('x%B1.16.1').header())
+        self.assertEqual(' 0000000000000101 ', Column.parse('x%B1.16.1').format(5, 16))
+        self.assertEqual('     -1 ', Column.parse('x%D1.6.1').format(0xFFFF, 16))
+        self.assertEqual(' 00FF ', Column.parse('x%X1.4.1').format(255, 16))
+        self.assertEqual('zx ', Column.parse('zx%B1.1.1').header())
+
+
+class TestHarness(unittest.TestCase):
+    def test_bit_order(self):
+        chip = load('Mux4Way16')
+        for (pin, value) in zip('abcd', [1, 2, 0x8000, 4]):
+            chip.set(pin, value)
+        chip.set('sel', 2)
+        chip.eval()
+        self.assertEqual(0x8000, chip.get('out'))
+
+    def test_unknown(self):
+        with self.assertRaises(KeyError):
+            load('CPU')
+        with self.assertRaises(KeyError):
+            load('And').set('out', 1)
+
+
+class TestRunner(unittest.TestCase):
+    def test_testdata(self):
+        scripts = glob.glob(os.path.join(TESTDATA, '*.tst'))
+        self.assertTrue(scripts)
+        for path in scripts:
+            self.assertGreater(run(path), 1, path)
+
+    def test_modes(self):
+        path = os.path.join(TESTDATA, 'ALU.tst')
+        for mode in [fidelity.GATE, fidelity.NETLIST, fidelity.NATIVE]:
+            with fidelity.using(mode):
+                self.assertGreater(run(path), 1, mode)
+        # the script goes through the registry, running the native ALU
+        alu = fidelity.chip('alu')
+        broken = lambda x, *args: native.alu(native.Not16(x), *args)
+        with mock.patch.dict(alu.implementations, {fidelity.NATIVE: broken}):
+            self.assertGreater(run(path), 1)
+            with fidelity.using(fidelity.NATIVE, 'alu'):
+                with self.assertRaises(ComparisonError):
+                    run(path)
+
+    def test_main_mode(self):
+        with tempfile.TemporaryDirectory() as d:
+            for name in ['Add16.tst', 'Add16.cmp']:
+                shutil.copy(os.path.join(TESTDATA, name), d)
+            with open(os.devnull, 'w') as devnull, mock.patch('sys.stdout', devnull):
+                try:
+                    self.assertEqual(0, main(['--mode', 'native', os.path.join(d, 'Add16.tst')]))
+                    self.assertEqual(fidelity.NATIVE, fidelity.registry.mode)
+                finally:
+                    fidelity.set_mode(fidelity.GATE)
+            self.assertTrue(os.path.exists(os.path.join(d, 'Add16.out')))
+
+    def write(self, directory, name, content):
+        with open(os.path.join(directory, name), 'w') as f:
+            f.write(content)
+        return os.path.join(directory, name)
+
+    def test_fail_fast(self):
+        with tempfile.TemporaryDirectory() as d:
+            self.write(d, 'Not.cmp', "|in |out|\n| 0 | 1 |\n| 1 | 1 |\n| 0 | 1 |\n")
+            path = self.write(d, 'Not.tst', """
+                load Not.hdl, compare-to Not.cmp, output-list in%B1.1.1 out%B1.1.1;
+                set in 0, eval, output;
+                set in 1, eval, output;
+                set in 0, eval, output;
+                set in %B2, eval, output;
+            """)
+            with self.assertRaises(ComparisonError) as ctx:
+                run(path)
+            self.assertEqual(3, ctx.exception.line)
+            self.assertEqual('| 1 | 1 |', ctx.exception.expected)
+            self.assertEqual('| 1 | 0 |', ctx.exception.actual)
+
+    def test_wildcard_and_length(self):
+        with tempfile.TemporaryDirectory() as d:
+            self.write(d, 'Not.cmp', "|in |out|\n| 0 | * |\n| 1 | 0 |\n")
+            path = self.write(d, 'Not.tst', """
+                load Not.hdl, compare-to Not.cmp, output-list in%B1.1.1 out%B1.1.1;
+                set in 0, eval, output;
+            """)
+            with self.assertRaises(ComparisonError) as ctx:
+                run(path)
+            self.assertEqual(3, ctx.exception.line)
+
+    def test_streaming(self):
+        with tempfile.TemporaryDirectory() as d:
+            with open(os.path.join(d, 'Not.cmp'), 'w') as f:
+                f.write('|in |out|\n')
+                for _ in range(5000):
+                    f.write('| 0 | 1 |\n| 1 | 0 |\n')
+            path = self.write(d, 'Not.tst', """
+                load Not.hdl, compare-to Not.cmp, output-list in%B1.1.1 out%B1.1.1;
+                repeat 5000 {
+                    set in 0, eval, output;
+                    set in 1, eval, output;
+                }
+            """)
+            self.assertEqual(10001, run(path))
+
+    def test_script_errors(self):
+        with tempfile.TemporaryDirectory() as d:
+            for source in ["eval;", "load Foo.hdl;", "load And.hdl, frobnicate;", "load And.hdl, set c 1;"]:
+                path = self.write(d, 'Bad.tst', source)
+                with self.assertRaises(ScriptError, msg=source):
+                    run(path)
+
+    def test_output_file(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = self.write(d, 'And.tst', "load And.hdl, output-file And.out, output-list out%B1.1.1; eval, output;")
+            run(path)
+            self.assertFalse(os.path.exists(os.path.join(d, 'And.out')))
+            run(path, write_output=True)
+            with open(os.path.join(d, 'And.out')) as f:
+                self.assertEqual("|out|\n| 0 |\n", f.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -21,11 +21,15 @@ setup(
         'pfbc',
         'pfbc.hardware',
     ],
+    package_data={
+        'pfbc.hardware': ['testdata/*.tst', 'testdata/*.cmp', '__cache__/*.bin'],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
     ],
-    python_requires='>=3.6',
+    python_requires='>=3.7',
+    install_requires=['numpy'],
     ext_modules=[Extension("pfbc.hardware.nirvana", [f"{root}/nirvana/primchips.c"])],
 )